@@ -4,17 +4,24 @@ Useful for batch processing and automation.
 """
 
 import argparse
+import asyncio
 import sys
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the src directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.document_processor import DocumentProcessor
 from src.vector_database import VectorDatabase, DocumentChunker
-from src.groq_client import GroqClient
 from src.config import settings
 
+# Number of chunks to accumulate before writing to the vector database
+UPLOAD_BATCH_SIZE = 256
+
+# Batches allowed to be embedding/writing in the background at once
+MAX_PENDING_WRITES = 2
+
 
 def main():
     parser = argparse.ArgumentParser(description='Technical Documentation Assistant CLI')
@@ -56,12 +63,37 @@ def main():
 
 def upload_documents(args):
     """Upload and process documents."""
+    # Imported here so other commands skip the document parsing stack
+    from src.document_processor import DocumentProcessor
+    
     processor = DocumentProcessor()
     vector_db = VectorDatabase()
     chunker = DocumentChunker()
     
     processed_count = 0
     total_chunks = 0
+    pending = []
+    
+    # Embedding and database writes run in the background while the main
+    # thread keeps parsing and chunking the next documents
+    pool = ThreadPoolExecutor(max_workers=MAX_PENDING_WRITES)
+    writes = deque()
+    
+    def flush(force=False):
+        """Submit accumulated chunks once a full batch is ready (or when forced)."""
+        if pending and (force or len(pending) >= UPLOAD_BATCH_SIZE):
+            writes.append(pool.submit(vector_db.add_documents, list(pending)))
+            pending.clear()
+            # Bound the number of in-flight batches to cap memory use
+            while len(writes) > MAX_PENDING_WRITES:
+                writes.popleft().result()
+    
+    def drain():
+        """Write any remaining chunks and wait for all background writes."""
+        flush(force=True)
+        while writes:
+            writes.popleft().result()
+        pool.shutdown()
     
     # Process files
     if args.files:
@@ -76,7 +108,8 @@ def upload_documents(args):
             if result['content']:
                 chunks = chunker.chunk_document(result)
                 if chunks:
-                    vector_db.add_documents(chunks)
+                    pending.extend(chunks)
+                    flush()
                     processed_count += 1
                     total_chunks += len(chunks)
                     print(f"  Added {len(chunks)} chunks")
@@ -87,43 +120,51 @@ def upload_documents(args):
     if args.directory:
         if not os.path.exists(args.directory):
             print(f"Directory not found: {args.directory}")
+            drain()
             return
         
         print(f"Processing directory: {args.directory}")
         results = processor.process_directory(args.directory)
         
+        # Splitting is cheap next to parsing, so chunk in-process rather than
+        # ship every parsed document out to a second process pool
         for result in results:
             if result['content']:
                 chunks = chunker.chunk_document(result)
                 if chunks:
-                    vector_db.add_documents(chunks)
+                    pending.extend(chunks)
+                    flush()
                     processed_count += 1
                     total_chunks += len(chunks)
                     print(f"  Processed: {result['source']} ({len(chunks)} chunks)")
     
     # Process URLs
     if args.urls:
-        for url in args.urls:
+        for url, result in zip(args.urls, processor.process_urls(args.urls)):
             print(f"Processing URL: {url}")
-            result = processor.process_url(url)
             
             if result['content']:
                 chunks = chunker.chunk_document(result)
                 if chunks:
-                    vector_db.add_documents(chunks)
+                    pending.extend(chunks)
+                    flush()
                     processed_count += 1
                     total_chunks += len(chunks)
                     print(f"  Added {len(chunks)} chunks")
             else:
                 print(f"  No content extracted from {url}")
     
+    drain()
+    
     print(f"\nSummary: Processed {processed_count} documents with {total_chunks} total chunks")
 
 
 def query_documentation(args):
     """Query the documentation."""
+    from src.groq_client import get_groq_client
+    
     vector_db = VectorDatabase()
-    groq_client = GroqClient()
+    groq_client = get_groq_client()
     
     print(f"Question: {args.question}")
     print("Searching for relevant documents...")
@@ -142,17 +183,17 @@ def query_documentation(args):
     
     # Generate answer
     if args.language or "code" in args.question.lower() or "example" in args.question.lower():
-        result = groq_client.generate_code_example(
+        result = asyncio.run(groq_client.generate_code_example(
             question=args.question,
             context_documents=relevant_docs,
             language=args.language
-        )
+        ))
         print(f"\nAnswer:\n{result['code_example']}")
     else:
-        result = groq_client.generate_answer(
+        result = asyncio.run(groq_client.generate_answer(
             question=args.question,
             context_documents=relevant_docs
-        )
+        ))
         print(f"\nAnswer:\n{result['answer']}")
     
     # Show sources
@@ -167,7 +208,8 @@ def query_documentation(args):
 
 def show_stats():
     """Show database statistics."""
-    vector_db = VectorDatabase()
+    # Stats never embed anything, so skip loading the model
+    vector_db = VectorDatabase(preload_model=False)
     stats = vector_db.get_collection_stats()
     
     print("Database Statistics:")
@@ -183,7 +225,7 @@ def reset_database():
         print("Reset cancelled.")
         return
     
-    vector_db = VectorDatabase()
+    vector_db = VectorDatabase(preload_model=False)
     success = vector_db.reset_database()
     
     if success:
@@ -2,7 +2,7 @@
 Configuration management for the Technical Documentation Assistant.
 """
 
-from typing import List
+from typing import FrozenSet, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -24,20 +24,45 @@ class Settings(BaseSettings):
     groq_model: str = Field(default="llama-3.3-70b-versatile", env="GROQ_MODEL")
     temperature: float = Field(default=0.1, env="TEMPERATURE")
     max_completion_tokens: int = Field(default=2000, env="MAX_COMPLETION_TOKENS")
+    # Most completion requests in flight at once
+    groq_max_concurrency: int = Field(default=8, env="GROQ_MAX_CONCURRENCY")
+
+    # LLM response cache
+    llm_cache_ttl: int = Field(default=3600, env="LLM_CACHE_TTL")
+    llm_cache_size: int = Field(default=1024, env="LLM_CACHE_SIZE")
+    llm_cache_similarity: float = Field(default=0.92, env="LLM_CACHE_SIMILARITY")
 
     # Vector Database
     chroma_persist_directory: str = Field(default="./chroma_db", env="CHROMA_PERSIST_DIRECTORY")
     embedding_model: str = Field(default="all-MiniLM-L6-v2", env="EMBEDDING_MODEL")
+    # HNSW index parameters, applied when the collection is created
+    hnsw_construction_ef: int = Field(default=200, env="HNSW_CONSTRUCTION_EF")
+    hnsw_m: int = Field(default=16, env="HNSW_M")
+    hnsw_search_ef: int = Field(default=100, env="HNSW_SEARCH_EF")
+    # Mirror vectors in a process-local hnswlib index and search it directly
+    memory_index: bool = Field(default=False, env="MEMORY_INDEX")
+    # Torch device for the embedding model ("cpu", "cuda", "mps", ...); unset picks automatically
+    embedding_device: Optional[str] = Field(default=None, env="EMBEDDING_DEVICE")
+    # Run the embedding model in float16 on CUDA
+    embedding_fp16: bool = Field(default=True, env="EMBEDDING_FP16")
+    # Torch intra-op threads when embedding on CPU; unset uses every core
+    embedding_threads: Optional[int] = Field(default=None, env="EMBEDDING_THREADS")
 
     # Processing
     chunk_size: int = Field(default=1000, env="CHUNK_SIZE")
     chunk_overlap: int = Field(default=200, env="CHUNK_OVERLAP")
     max_tokens: int = Field(default=4000, env="MAX_TOKENS")
+    # "markdown-it" (token stream) or "markdown" (legacy HTML round-trip).
+    # The two extract different text: markdown-it moves every fenced block
+    # into the code section and drops raw HTML, while the legacy path keeps
+    # ``` fences inline in the prose (no fenced_code extension). Cached
+    # extractions are keyed by parser, so switching re-parses every file
+    markdown_parser: str = Field(default="markdown-it", env="MARKDOWN_PARSER")
 
-    # Supported file types
-    supported_extensions: List[str] = [
+    # File types accepted for ingestion (a subset of those with a parser)
+    supported_extensions: FrozenSet[str] = Field(default_factory=lambda: frozenset({
         ".md", ".markdown", ".html", ".htm", ".pdf", ".txt", ".json", ".yaml", ".yml"
-    ]
+    }))
 
     class Config:
         env_file = ".env"
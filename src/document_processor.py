@@ -2,20 +2,207 @@
 Document processing utilities for parsing various documentation formats.
 """
 
-import json
+import asyncio
+import io
+import mmap
+import os
+import re
+import tempfile
+import threading
+from time import time
+import orjson
 import yaml
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, islice
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, Iterator, List, Optional, TypeVar, Union
 from pathlib import Path
 import logging
 
-# Import processing libraries
-import markdown
-from bs4 import BeautifulSoup
-import PyPDF2
-import requests
+from .config import settings
+
+# Fingerprint files with SIMD-accelerated BLAKE3 when available; the keys
+# only need to be collision resistant, not cryptographically strong
+try:
+    from blake3 import blake3 as _file_hasher
+except ImportError:
+    from hashlib import sha256 as _file_hasher
+
+# Use libyaml's C loader/dumper when PyYAML was built against it
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Directories with at most this many candidate files are processed inline,
+# since spinning up a process pool costs more than it saves.
+PARALLEL_MIN_FILES = 4
+
+# Bump whenever extraction output changes so stale cache entries are ignored
+PROCESSOR_VERSION = 7
+
+# Most extraction results kept on disk; the least recently used are pruned
+EXTRACTION_CACHE_MAX_ENTRIES = 10000
+
+# Cache writes per processor between checks of the entry count
+EXTRACTION_CACHE_PRUNE_INTERVAL = 64
+
+# Files are hashed in blocks of this size to keep memory flat on large PDFs
+HASH_BLOCK_SIZE = 1 << 20
+
+# Runs of whitespace collapsed to a single space in extracted HTML text
+_WS_RE = re.compile(r"\s+")
+
+# HTML elements kept when extracting code and readable text from pages
+HTML_CODE_TAGS = ['code', 'pre']
+HTML_TEXT_TAGS = [
+    'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'td', 'th',
+    'dt', 'dd', 'blockquote', 'caption', 'figcaption', 'summary'
+]
+
+# Share of a page's visible text the strained parse must recover; below it
+# the page keeps prose elsewhere (plain divs, spans...) and is parsed in full
+HTML_MIN_STRAINED_COVERAGE = 0.8
+
+# Script/style bodies and comments, then any tag, for estimating visible text
+_HTML_HIDDEN_RE = re.compile(r"<(script|style)\b.*?</\1\s*>|<!--.*?-->", re.DOTALL | re.IGNORECASE)
+_HTML_TAG_RE = re.compile(r"<[^>]*>")
+
+# Lines that markdown would render as an indented code block
+_INDENTED_CODE_RE = re.compile(r"^(?: {4}|\t)\S", re.MULTILINE)
+
+# Maximum number of URLs fetched concurrently by process_urls
+URL_FETCH_WORKERS = 8
+
+def _decode_text(data: bytes) -> str:
+    """Decode UTF-8 content with universal newlines, matching how text-mode open() reads files."""
+    return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _visible_text_length(html_content: str) -> int:
+    """Estimate how much readable text an HTML page holds, without parsing it."""
+    text = _HTML_TAG_RE.sub(" ", _HTML_HIDDEN_RE.sub(" ", html_content))
+    return len(_WS_RE.sub(" ", text).strip())
+
+
+def _extraction_cache_dir() -> Path:
+    """Return the directory holding cached extraction results."""
+    return Path(settings.chroma_persist_directory) / "doc_cache"
+
+
+def clear_extraction_cache() -> None:
+    """Delete every cached extraction result (e.g. when the database is reset)."""
+    cache_dir = _extraction_cache_dir()
+    if not cache_dir.is_dir():
+        return
+    for entry in cache_dir.iterdir():
+        try:
+            entry.unlink()
+        except OSError as e:
+            logger.warning(f"Could not remove cache entry {entry}: {str(e)}")
+
+
+# Per-worker processor and chunker, created once by the pool initializers
+_worker_processor = None
+_worker_chunker = None
+
+
+def _init_worker() -> None:
+    """Create the per-process DocumentProcessor used by pool workers."""
+    global _worker_processor
+    _worker_processor = DocumentProcessor()
+
+
+def _process_file_worker(file_path: str) -> Dict[str, Any]:
+    """Process a single file inside a pool worker."""
+    return _worker_processor.process_file(file_path)
+
+
+def init_ingest_worker() -> None:
+    """Create the per-process DocumentProcessor and DocumentChunker used by ingest pool workers."""
+    global _worker_chunker
+    from .vector_database import DocumentChunker
+    
+    _init_worker()
+    _worker_chunker = DocumentChunker()
+
+
+def ingest_file_worker(file_path: str) -> List[Dict[str, Any]]:
+    """Parse and chunk a file inside an ingest pool worker."""
+    return _worker_chunker.chunk_document(_worker_processor.process_file(file_path))
+
+
+def ingest_bytes_worker(data: bytes, filename: str) -> List[Dict[str, Any]]:
+    """Parse and chunk in-memory file content inside an ingest pool worker."""
+    return _worker_chunker.chunk_document(_worker_processor.process_bytes(data, filename))
+
+
+def chunk_worker(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Chunk an already processed document inside an ingest pool worker."""
+    return _worker_chunker.chunk_document(result)
+
+
+async def ingest_paths(paths: Iterator[str], ingest: Callable[[str], Awaitable[T]],
+                       workers: int) -> AsyncIterator[T]:
+    """
+    Run ingest over paths with a fixed number of concurrent consumers.
+    
+    Paths are pulled from the (possibly slow, blocking) iterator on a thread
+    into a bounded queue as they are found. The first error from the walk or
+    from ingest is raised to the caller; on an error or an early close the
+    walk and every consumer still running are cancelled and awaited, so no
+    task outlives the iteration.
+    
+    Args:
+        paths: Iterator of file paths, e.g. from iter_supported_files
+        ingest: Coroutine function processing one path
+        workers: Number of concurrent consumers
+        
+    Returns:
+        Async iterator of ingest results, in completion order
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 4)
+    # Unbounded, so reporting a result, an end marker or an error never blocks
+    results: asyncio.Queue = asyncio.Queue()
+    
+    async def discover() -> None:
+        try:
+            while (path := await asyncio.to_thread(next, paths, None)) is not None:
+                await queue.put(path)
+        except Exception as e:
+            results.put_nowait(e)
+            return
+        for _ in range(workers):
+            await queue.put(None)
+    
+    async def consume() -> None:
+        try:
+            while (path := await queue.get()) is not None:
+                results.put_nowait(await ingest(path))
+        except Exception as e:
+            results.put_nowait(e)
+        else:
+            results.put_nowait(None)
+    
+    tasks = [asyncio.create_task(discover())] + [asyncio.create_task(consume()) for _ in range(workers)]
+    try:
+        finished = 0
+        while finished < workers:
+            item = await results.get()
+            if item is None:
+                finished += 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
 
 class DocumentProcessor:
     """Handles parsing and processing of various document formats."""
@@ -32,6 +219,36 @@ class DocumentProcessor:
             '.yaml': self._process_yaml,
             '.yml': self._process_yaml
         }
+        # In-memory counterparts of supported_formats, used by process_bytes
+        self._content_processors = {
+            '.md': lambda data: self._process_markdown_content(_decode_text(data)),
+            '.markdown': lambda data: self._process_markdown_content(_decode_text(data)),
+            '.html': lambda data: self._process_html_content(_decode_text(data)),
+            '.htm': lambda data: self._process_html_content(_decode_text(data)),
+            '.pdf': self._process_pdf_bytes,
+            '.txt': _decode_text,
+            '.json': self._process_json_content,
+            '.yaml': lambda data: self._process_yaml_content(_decode_text(data)),
+            '.yml': lambda data: self._process_yaml_content(_decode_text(data))
+        }
+        # Formats enabled in settings that have a parser; a frozenset for
+        # constant-time membership checks during directory scans
+        self._supported_exts = frozenset(self.supported_formats) & settings.supported_extensions
+        
+        # Heavy parsing/HTTP libraries are imported on first use so commands
+        # and pool workers that never touch a format don't pay for them
+        self._session = None
+        # URL fetches run on threads; only one of them may create the session
+        self._session_lock = threading.Lock()
+        self._markdown = None
+        self._markdown_it = None
+        self._beautiful_soup = None
+        self._html_strainers = None
+        self._pdf_backend = None
+        
+        # Extracted content keyed by file hash and format, reused across runs
+        self._cache_dir = _extraction_cache_dir()
+        self._cache_writes = 0
     
     def process_file(self, file_path: str) -> Dict[str, Any]:
         """
@@ -49,19 +266,59 @@ class DocumentProcessor:
                 raise FileNotFoundError(f"File not found: {file_path}")
             
             extension = path.suffix.lower()
-            if extension not in self.supported_formats:
+            if extension not in self._supported_exts:
                 logger.warning(f"Unsupported file format: {extension}")
                 return self._create_result(file_path, "", f"Unsupported format: {extension}")
             
+            digest = self._file_digest(file_path)
+            cached = self._load_cached(digest, extension)
+            if cached is not None:
+                return self._create_result(file_path, cached['content'], "success", cached['metadata'])
+            
             processor = self.supported_formats[extension]
             content = processor(file_path)
             
-            return self._create_result(file_path, content, "success")
+            result = self._create_result(file_path, content, "success")
+            self._store_cached(digest, extension, result)
+            return result
             
         except Exception as e:
             logger.error(f"Error processing file {file_path}: {str(e)}")
             return self._create_result(file_path, "", f"Error: {str(e)}")
     
+    def process_bytes(self, data: bytes, filename: str) -> Dict[str, Any]:
+        """
+        Process a file's content that is already in memory, e.g. an upload.
+        
+        Args:
+            data: Raw file content
+            filename: Original file name; its extension selects the parser
+                and it is used as the result's source
+            
+        Returns:
+            Dict containing extracted content and metadata
+        """
+        try:
+            extension = Path(filename).suffix.lower()
+            if extension not in self._supported_exts:
+                logger.warning(f"Unsupported file format: {extension}")
+                return self._create_result(filename, "", f"Unsupported format: {extension}")
+            
+            digest = _file_hasher(data).hexdigest()
+            cached = self._load_cached(digest, extension)
+            if cached is not None:
+                return self._create_result(filename, cached['content'], "success", cached['metadata'])
+            
+            content = self._content_processors[extension](data)
+            
+            result = self._create_result(filename, content, "success")
+            self._store_cached(digest, extension, result)
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error processing file {filename}: {str(e)}")
+            return self._create_result(filename, "", f"Error: {str(e)}")
+    
     def process_directory(self, directory_path: str) -> List[Dict[str, Any]]:
         """
         Process all supported files in a directory recursively.
@@ -72,20 +329,182 @@ class DocumentProcessor:
         Returns:
             List of processed document results
         """
-        results = []
         directory = Path(directory_path)
         
         if not directory.exists() or not directory.is_dir():
             logger.error(f"Directory not found or not a directory: {directory_path}")
-            return results
+            return []
+        
+        paths = self.iter_supported_files(directory_path)
         
-        for file_path in directory.rglob("*"):
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_formats:
-                result = self.process_file(str(file_path))
-                if result['content']:  # Only add files with content
-                    results.append(result)
+        # Peek far enough to decide whether a process pool is worth it
+        head = list(islice(paths, PARALLEL_MIN_FILES + 1))
         
-        return results
+        if len(head) > PARALLEL_MIN_FILES:
+            # Parse files in parallel; map() yields results in submission order
+            with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker) as executor:
+                results = list(executor.map(_process_file_worker, chain(head, paths), chunksize=8))
+        else:
+            results = [self.process_file(path) for path in head]
+        
+        # Only keep files with content
+        return [result for result in results if result['content']]
+    
+    def _get_session(self):
+        """Return the shared HTTP session, reusing connections across URL fetches."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    from urllib3.util.retry import Retry
+                    
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=16,
+                        pool_maxsize=32,
+                        max_retries=Retry(total=3, backoff_factor=0.3)
+                    )
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+    
+    def _get_markdown_it(self):
+        """Return the shared markdown-it tokenizer."""
+        if self._markdown_it is None:
+            from markdown_it import MarkdownIt
+            self._markdown_it = MarkdownIt()
+        return self._markdown_it
+    
+    def _get_markdown(self):
+        """Return the python-markdown module."""
+        if self._markdown is None:
+            import markdown
+            self._markdown = markdown
+        return self._markdown
+    
+    def _get_beautiful_soup(self):
+        """Return the BeautifulSoup class."""
+        if self._beautiful_soup is None:
+            from bs4 import BeautifulSoup
+            self._beautiful_soup = BeautifulSoup
+        return self._beautiful_soup
+    
+    def _get_html_strainers(self):
+        """Return the (code, text) SoupStrainers used to parse only the HTML we extract."""
+        if self._html_strainers is None:
+            from bs4 import SoupStrainer
+            self._html_strainers = (
+                SoupStrainer(HTML_CODE_TAGS),
+                SoupStrainer(HTML_TEXT_TAGS)
+            )
+        return self._html_strainers
+    
+    def _get_pdf_backend(self):
+        """Return the PDF library, preferring PDFium and falling back to pure-Python PyPDF2."""
+        if self._pdf_backend is None:
+            try:
+                import pypdfium2 as backend
+            except ImportError:
+                import PyPDF2 as backend
+            self._pdf_backend = backend
+        return self._pdf_backend
+    
+    def _file_digest(self, file_path: str) -> str:
+        """Return the hex fingerprint of a file, read in fixed-size blocks."""
+        digest = _file_hasher()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _cache_path(self, digest: str, extension: str) -> Path:
+        """
+        Return the cache file for a content digest.
+        
+        The extension is part of the key because it selects the parser, so
+        identical bytes saved as .md and .txt extract differently; markdown
+        entries also record which markdown parser produced them.
+        """
+        fmt = extension.lstrip('.')
+        if self.supported_formats.get(extension) == self._process_markdown:
+            fmt = f"{fmt}-{settings.markdown_parser}"
+        return self._cache_dir / f"{digest}-{fmt}-v{PROCESSOR_VERSION}.json"
+    
+    def _load_cached(self, digest: str, extension: str) -> Optional[Dict[str, Any]]:
+        """Load a cached extraction result, or None on a miss."""
+        cache_path = self._cache_path(digest, extension)
+        if not cache_path.exists():
+            return None
+        try:
+            cached = orjson.loads(cache_path.read_bytes())
+            # Mark the entry as recently used so pruning keeps it
+            os.utime(cache_path)
+            return cached
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {cache_path}: {str(e)}")
+            return None
+    
+    def _store_cached(self, digest: str, extension: str, result: Dict[str, Any]) -> None:
+        """Atomically write an extraction result to the cache."""
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            payload = orjson.dumps({'content': result['content'], 'metadata': result['metadata']})
+            with tempfile.NamedTemporaryFile(dir=self._cache_dir, suffix=".tmp", delete=False) as tmp:
+                tmp.write(payload)
+            os.replace(tmp.name, self._cache_path(digest, extension))
+        except OSError as e:
+            logger.warning(f"Could not write cache entry for {result['source']}: {str(e)}")
+            return
+        
+        self._cache_writes += 1
+        if self._cache_writes % EXTRACTION_CACHE_PRUNE_INTERVAL == 0:
+            self._prune_cache()
+    
+    def _prune_cache(self) -> None:
+        """Delete the least recently used cache entries beyond EXTRACTION_CACHE_MAX_ENTRIES."""
+        try:
+            entries = [(entry.stat().st_mtime, entry) for entry in self._cache_dir.glob("*.json")]
+        except OSError as e:
+            logger.warning(f"Could not scan the extraction cache: {str(e)}")
+            return
+        if len(entries) <= EXTRACTION_CACHE_MAX_ENTRIES:
+            return
+        entries.sort()
+        for _, entry in entries[:len(entries) - EXTRACTION_CACHE_MAX_ENTRIES]:
+            try:
+                entry.unlink()
+            except OSError:
+                # Already removed by another process pruning concurrently
+                pass
+    
+    def iter_supported_files(self, root: str) -> Iterator[str]:
+        """
+        Yield paths of supported files under root as they are found.
+        
+        Args:
+            root: Directory to walk recursively with os.scandir
+            
+        Returns:
+            Iterator of file paths
+        """
+        stack = [root]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        # Like os.walk, symlinked directories are not descended
+                        # into (so the walk cannot loop) but symlinked files count
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            extension = os.path.splitext(entry.name)[1].lower()
+                            if extension in self._supported_exts:
+                                yield entry.path
+            except OSError as e:
+                logger.warning(f"Skipping unreadable directory {current}: {str(e)}")
     
     def process_url(self, url: str) -> Dict[str, Any]:
         """
@@ -98,7 +517,7 @@ class DocumentProcessor:
             Dict containing extracted content and metadata
         """
         try:
-            response = requests.get(url, timeout=30)
+            response = self._get_session().get(url, timeout=30)
             response.raise_for_status()
             
             content_type = response.headers.get('content-type', '').lower()
@@ -118,14 +537,70 @@ class DocumentProcessor:
             logger.error(f"Error processing URL {url}: {str(e)}")
             return self._create_result(url, "", f"Error: {str(e)}")
     
+    def process_urls(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """
+        Process several URLs concurrently over the shared HTTP session.
+        
+        Args:
+            urls: URLs to process
+            
+        Returns:
+            List of results, in the same order as the input URLs
+        """
+        if len(urls) <= 1:
+            return [self.process_url(url) for url in urls]
+        
+        with ThreadPoolExecutor(max_workers=URL_FETCH_WORKERS) as executor:
+            return list(executor.map(self.process_url, urls))
+    
     def _process_markdown(self, file_path: str) -> str:
         """Process Markdown files."""
         with open(file_path, 'r', encoding='utf-8') as file:
             md_content = file.read()
+        return self._process_markdown_content(md_content)
+    
+    def _process_markdown_content(self, md_content: str) -> str:
+        """Process Markdown content."""
+        # Markdown without code is already readable text; skip parsing it
+        if "```" not in md_content and "~~~" not in md_content and not _INDENTED_CODE_RE.search(md_content):
+            return md_content
+        
+        if settings.markdown_parser == "markdown":
+            return self._process_markdown_html(md_content)
+        return self._process_markdown_tokens(md_content)
+    
+    def _process_markdown_tokens(self, md_content: str) -> str:
+        """Extract text and code from Markdown in a single pass over its token stream."""
+        text_parts = []
+        code_blocks = []
+        
+        for token in self._get_markdown_it().parse(md_content):
+            if token.type in ("fence", "code_block"):
+                code_blocks.append(token.content)
+            elif token.type == "inline":
+                parts = []
+                for child in token.children or ():
+                    if child.type == "text":
+                        parts.append(child.content)
+                    elif child.type in ("softbreak", "hardbreak"):
+                        parts.append("\n")
+                    elif child.type == "code_inline":
+                        code_blocks.append(child.content)
+                text_parts.append("".join(parts))
+        
+        text_content = "\n".join(text_parts)
+        
+        # Combine text and code blocks
+        if code_blocks:
+            text_content += "\n\nCode Examples:\n" + "\n".join(code_blocks)
         
+        return text_content
+    
+    def _process_markdown_html(self, md_content: str) -> str:
+        """Extract text and code from Markdown via an HTML round-trip."""
         # Convert to HTML first to extract clean text
-        html = markdown.markdown(md_content)
-        soup = BeautifulSoup(html, 'html.parser')
+        html = self._get_markdown().markdown(md_content)
+        soup = self._get_beautiful_soup()(html, 'lxml')
         
         # Extract code blocks separately
         code_blocks = []
@@ -150,24 +625,23 @@ class DocumentProcessor:
     
     def _process_html_content(self, html_content: str, base_url: str = None) -> str:
         """Process HTML content."""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        beautiful_soup = self._get_beautiful_soup()
+        code_strainer, text_strainer = self._get_html_strainers()
         
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        # Extract code blocks
-        code_blocks = []
-        for code in soup.find_all(['code', 'pre']):
-            code_blocks.append(code.get_text())
+        # Two narrow parses build far smaller trees than one full-document
+        # parse; script/style content is never materialized at all
+        code_soup = beautiful_soup(html_content, 'lxml', parse_only=code_strainer)
+        code_blocks = [code.get_text() for code in code_soup.find_all(['code', 'pre'])]
         
-        # Get main text
-        text_content = soup.get_text()
+        text_soup = beautiful_soup(html_content, 'lxml', parse_only=text_strainer)
+        text_content = _WS_RE.sub(" ", text_soup.get_text(" ", strip=True))
         
-        # Clean up whitespace
-        lines = (line.strip() for line in text_content.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text_content = ' '.join(chunk for chunk in chunks if chunk)
+        # Fall back to the whole page when the strained tags miss much of its text
+        if len(text_content) < HTML_MIN_STRAINED_COVERAGE * _visible_text_length(html_content):
+            soup = beautiful_soup(html_content, 'lxml')
+            for hidden in soup(["script", "style"]):
+                hidden.decompose()
+            text_content = _WS_RE.sub(" ", soup.get_text(" ", strip=True))
         
         # Add code blocks
         if code_blocks:
@@ -177,17 +651,56 @@ class DocumentProcessor:
     
     def _process_pdf(self, file_path: str) -> str:
         """Process PDF files."""
-        text_content = ""
+        backend = self._get_pdf_backend()
+        parts = []
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text_content += page.extract_text() + "\n"
+            if backend.__name__ == 'pypdfium2':
+                # PDFium opens the file itself and reads pages on demand
+                parts = self._pdfium_pages_text(backend.PdfDocument(file_path))
+            else:
+                with open(file_path, 'rb') as file:
+                    if os.fstat(file.fileno()).st_size == 0:
+                        return ""
+                    # Map the file so the OS pages it in lazily instead of buffering reads
+                    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        pdf_reader = backend.PdfReader(mapped)
+                        for page in pdf_reader.pages:
+                            parts.append(page.extract_text() or "")
         except Exception as e:
             logger.error(f"Error processing PDF {file_path}: {str(e)}")
             raise
         
-        return text_content
+        return "\n".join(parts)
+    
+    def _pdfium_pages_text(self, pdf) -> List[str]:
+        """Extract the text of every page of an open PDFium document, then close it."""
+        parts = []
+        try:
+            for i in range(len(pdf)):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                parts.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+        return parts
+    
+    def _process_pdf_bytes(self, data: bytes) -> str:
+        """Process PDF content held in memory."""
+        if not data:
+            return ""
+        
+        backend = self._get_pdf_backend()
+        parts = []
+        if backend.__name__ == 'pypdfium2':
+            parts = self._pdfium_pages_text(backend.PdfDocument(data))
+        else:
+            pdf_reader = backend.PdfReader(io.BytesIO(data))
+            for page in pdf_reader.pages:
+                parts.append(page.extract_text() or "")
+        
+        return "\n".join(parts)
     
     def _process_text(self, file_path: str) -> str:
         """Process plain text files."""
@@ -196,24 +709,27 @@ class DocumentProcessor:
     
     def _process_json(self, file_path: str) -> str:
         """Process JSON files (including OpenAPI specs)."""
-        with open(file_path, 'r', encoding='utf-8') as file:
+        # orjson validates UTF-8 itself, so skip the text decode
+        with open(file_path, 'rb') as file:
             content = file.read()
         return self._process_json_content(content)
     
-    def _process_json_content(self, content: str) -> str:
+    def _process_json_content(self, content: Union[str, bytes]) -> str:
         """Process JSON content."""
         try:
-            data = json.loads(content)
+            data = orjson.loads(content)
             
             # Check if it's an OpenAPI specification
             if 'openapi' in data or 'swagger' in data:
                 return self._process_openapi_spec(data)
             
             # For regular JSON, create a readable format
-            return json.dumps(data, indent=2)
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Error parsing JSON: {str(e)}")
+            if isinstance(content, bytes):
+                return content.decode('utf-8', errors='replace')
             return content
     
     def _process_yaml(self, file_path: str) -> str:
@@ -225,14 +741,14 @@ class DocumentProcessor:
     def _process_yaml_content(self, content: str) -> str:
         """Process YAML content."""
         try:
-            data = yaml.safe_load(content)
+            data = yaml.load(content, Loader=_YamlLoader)
             
             # Check if it's an OpenAPI specification
             if isinstance(data, dict) and ('openapi' in data or 'swagger' in data):
                 return self._process_openapi_spec(data)
             
             # For regular YAML, create a readable format
-            return yaml.dump(data, default_flow_style=False)
+            return yaml.dump(data, Dumper=_YamlDumper, default_flow_style=False)
             
         except yaml.YAMLError as e:
             logger.error(f"Error parsing YAML: {str(e)}")
@@ -241,50 +757,56 @@ class DocumentProcessor:
     def _process_openapi_spec(self, spec_data: Dict[str, Any]) -> str:
         """Process OpenAPI/Swagger specifications."""
         try:
-            result = []
+            result: List[str] = []
+            result_append = result.append
             
             # Basic info
             info = spec_data.get('info', {})
-            result.append(f"API: {info.get('title', 'Unknown API')}")
-            result.append(f"Version: {info.get('version', 'Unknown')}")
-            if 'description' in info:
-                result.append(f"Description: {info['description']}")
+            result_append(f"API: {info.get('title', 'Unknown API')}")
+            result_append(f"Version: {info.get('version', 'Unknown')}")
+            description = info.get('description')
+            if description is not None:
+                result_append(f"Description: {description}")
             
             # Servers
             servers = spec_data.get('servers', [])
             if servers:
-                result.append("\nServers:")
+                result_append("\nServers:")
                 for server in servers:
-                    result.append(f"- {server.get('url', 'Unknown URL')}")
+                    result_append(f"- {server.get('url', 'Unknown URL')}")
             
             # Paths and operations
             paths = spec_data.get('paths', {})
             if paths:
-                result.append("\nAPI Endpoints:")
+                result_append("\nAPI Endpoints:")
                 for path, methods in paths.items():
-                    result.append(f"\nPath: {path}")
+                    result_append(f"\nPath: {path}")
                     for method, operation in methods.items():
-                        if isinstance(operation, dict):
-                            summary = operation.get('summary', method.upper())
-                            result.append(f"  {method.upper()}: {summary}")
-                            if 'description' in operation:
-                                result.append(f"    Description: {operation['description']}")
+                        if not isinstance(operation, dict):
+                            continue
+                        method_name = method.upper()
+                        result_append(f"  {method_name}: {operation.get('summary', method_name)}")
+                        description = operation.get('description')
+                        if description is not None:
+                            result_append(f"    Description: {description}")
             
             # Components/Schemas
-            components = spec_data.get('components', {})
-            schemas = components.get('schemas', {})
+            schemas = spec_data.get('components', {}).get('schemas', {})
             if schemas:
-                result.append("\nData Models:")
+                result_append("\nData Models:")
                 for schema_name, schema_def in schemas.items():
-                    result.append(f"- {schema_name}")
-                    if isinstance(schema_def, dict) and 'description' in schema_def:
-                        result.append(f"  Description: {schema_def['description']}")
+                    result_append(f"- {schema_name}")
+                    if not isinstance(schema_def, dict):
+                        continue
+                    description = schema_def.get('description')
+                    if description is not None:
+                        result_append(f"  Description: {description}")
             
             return "\n".join(result)
             
         except Exception as e:
             logger.error(f"Error processing OpenAPI spec: {str(e)}")
-            return json.dumps(spec_data, indent=2)
+            return orjson.dumps(spec_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
     
     def _create_result(self, source: str, content: str, status: str, metadata: Optional[Dict] = None) -> Dict[str, Any]:
         """Create a standardized result dictionary."""
@@ -293,5 +815,5 @@ class DocumentProcessor:
             'content': content,
             'status': status,
             'metadata': metadata or {},
-            'processed_at': str(Path().absolute())
+            'processed_at': time()
         }
@@ -2,25 +2,104 @@
 Groq API integration for natural language processing and code generation.
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from groq import Groq
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+import httpx
+from groq import APIError, AsyncGroq
 
 from .config import settings
+from .groq_limiter import RequestLimiter
+from .llm_cache import LLMCache
 
 logger = logging.getLogger(__name__)
 
+# Connection pool shared by every Groq call in this process (HTTP/2, keep-alive)
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# Failures talking to the API that are reported to the caller instead of raised;
+# anything else is a bug and propagates
+GROQ_ERRORS = (APIError, httpx.HTTPError, asyncio.TimeoutError, TimeoutError)
+
+# Shared read-only default for documents without metadata
+_EMPTY = MappingProxyType({})
+
+# Upper bound on documentation characters placed in a prompt
+MAX_CONTEXT_CHARS = 16000
+
+# System prompts are built once so every request sends byte-identical
+# prefixes, which Groq's prompt cache can reuse across users
+SYSTEM_PROMPT = """You are a Technical Documentation Assistant, an expert AI that helps developers understand APIs, SDKs, and software products by analyzing their documentation.
+
+Your capabilities:
+- Analyze technical documentation and provide accurate, contextual answers
+- Generate relevant code examples when appropriate
+- Explain complex technical concepts clearly
+- Reference specific parts of the documentation when answering
+
+Guidelines:
+1. Base your answers strictly on the provided documentation context
+2. If information is not available in the context, clearly state this limitation
+3. Provide specific, actionable answers with code examples when relevant
+4. Include references to the source documents when possible
+5. If asked about code, provide functional, well-commented examples
+6. Explain technical concepts in a clear, developer-friendly manner
+
+Always prioritize accuracy and cite your sources from the provided documentation."""
+
+CODE_SYSTEM_PROMPT_TEMPLATE = """You are a Technical Documentation Assistant specialized in generating code examples{lang_instruction}.
+
+Your responsibilities:
+1. Generate functional, well-commented code examples based on documentation
+2. Ensure code follows best practices and conventions
+3. Include error handling where appropriate
+4. Provide clear explanations of what the code does
+5. Reference the relevant documentation sections
+
+Guidelines for code generation:
+- Write production-ready code that actually works
+- Include necessary imports and dependencies
+- Add comments explaining key concepts
+- Follow language-specific conventions and best practices
+- Provide complete, runnable examples when possible"""
+
+SUMMARY_SYSTEM_PROMPT = """You are a technical documentation summarizer.
+Create concise, informative summaries that highlight key concepts,
+APIs, and important technical details."""
+
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+SUMMARY_SYSTEM_MESSAGE = {"role": "system", "content": SUMMARY_SYSTEM_PROMPT}
+
+
+@lru_cache(maxsize=32)
+def _code_system_message(language: Optional[str] = None) -> Dict[str, str]:
+    """Return the system message for code generation in the given language."""
+    lang_instruction = f" in {language}" if language else ""
+    return {"role": "system", "content": CODE_SYSTEM_PROMPT_TEMPLATE.format(lang_instruction=lang_instruction)}
+
+
+@lru_cache(maxsize=None)
+def _get_async_http_client() -> httpx.AsyncClient:
+    """Return the process-wide async HTTP client used for Groq calls."""
+    return httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+
 
 class GroqClient:
     """Handles interactions with the Groq API for LLM capabilities."""
     
-    def __init__(self):
-        self.client = Groq(api_key=settings.groq_api_key)
+    def __init__(self, cache: Optional[LLMCache] = None):
+        # Async client so calls never block the event loop while waiting on the API
+        self.client = AsyncGroq(api_key=settings.groq_api_key, http_client=_get_async_http_client())
+        self.limiter = RequestLimiter(self.client)
+        self.cache = cache
         self.model = settings.groq_model
         self.temperature = settings.temperature
         self.max_tokens = settings.max_completion_tokens
     
-    def generate_answer(self, question: str, context_documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def generate_answer(self, question: str, context_documents: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Generate an answer to a question based on provided context documents.
         
@@ -32,38 +111,20 @@ class GroqClient:
             Dict containing the answer and metadata
         """
         try:
-            # Prepare context from documents
-            context = self._prepare_context(context_documents)
-            
-            # Create system prompt
-            system_prompt = self._create_system_prompt()
-            
-            # Create user prompt with context and question
-            user_prompt = self._create_user_prompt(question, context)
-            
-            # Generate response
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
-            )
-            
-            answer = response.choices[0].message.content
+            extracted = self._extract_documents(context_documents)
+            messages = self._answer_messages(question, extracted)
+            answer, tokens_used = await self._complete(messages, self.temperature, question, namespace="answer")
             
             return {
                 "answer": answer,
-                "sources": [doc.get('metadata', {}).get('source', 'Unknown') for doc in context_documents],
+                "sources": [source for source, _ in extracted],
                 "confidence": self._calculate_confidence(context_documents),
-                "tokens_used": response.usage.total_tokens if hasattr(response, 'usage') else 0,
+                "tokens_used": tokens_used,
                 "model": self.model
             }
             
-        except Exception as e:
-            logger.error(f"Error generating answer: {str(e)}")
+        except GROQ_ERRORS as e:
+            logger.error("Error generating answer: %s", e)
             return {
                 "answer": f"I apologize, but I encountered an error while processing your question: {str(e)}",
                 "sources": [],
@@ -72,7 +133,29 @@ class GroqClient:
                 "model": self.model
             }
     
-    def generate_code_example(self, question: str, context_documents: List[Dict[str, Any]], 
+    def generate_answer_stream(self, question: str,
+                               context_documents: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an answer to a question as it is generated.
+        
+        Args:
+            question: User's question
+            context_documents: Relevant documents from vector search
+            
+        Returns:
+            Async iterator of events: {"type": "token", "content": ...} for each
+            generated text fragment, then a final {"type": "done", ...} event
+            with sources, confidence, tokens_used and model, or
+            {"type": "error", "error": ...} on failure
+        """
+        extracted = self._extract_documents(context_documents)
+        return self._stream_completion(
+            self._answer_messages(question, extracted), self.temperature, question,
+            [source for source, _ in extracted], self._calculate_confidence(context_documents),
+            namespace="answer", error_label="generating answer"
+        )
+    
+    async def generate_code_example(self, question: str, context_documents: List[Dict[str, Any]], 
                             language: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate a code example based on the question and context.
@@ -86,42 +169,146 @@ class GroqClient:
             Dict containing code example and explanation
         """
         try:
-            context = self._prepare_context(context_documents)
-            
-            system_prompt = self._create_code_system_prompt(language)
-            user_prompt = self._create_code_user_prompt(question, context, language)
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1,  # Lower temperature for code generation
-                max_tokens=self.max_tokens
+            extracted = self._extract_documents(context_documents)
+            messages = self._code_messages(question, extracted, language)
+            code_example, tokens_used = await self._complete(
+                messages, 0.1, question, namespace=f"code:{language or ''}"  # Lower temperature for code generation
             )
             
-            answer = response.choices[0].message.content
-            
             return {
-                "code_example": answer,
-                "sources": [doc.get('metadata', {}).get('source', 'Unknown') for doc in context_documents],
+                "code_example": code_example,
+                "sources": [source for source, _ in extracted],
+                "confidence": self._calculate_confidence(context_documents),
                 "language": language,
-                "tokens_used": response.usage.total_tokens if hasattr(response, 'usage') else 0,
+                "tokens_used": tokens_used,
                 "model": self.model
             }
             
-        except Exception as e:
-            logger.error(f"Error generating code example: {str(e)}")
+        except GROQ_ERRORS as e:
+            logger.error("Error generating code example: %s", e)
             return {
                 "code_example": f"// Error generating code example: {str(e)}",
                 "sources": [],
+                "confidence": 0.0,
                 "language": language,
                 "tokens_used": 0,
                 "model": self.model
             }
     
-    def summarize_documents(self, documents: List[Dict[str, Any]]) -> str:
+    def generate_code_example_stream(self, question: str, context_documents: List[Dict[str, Any]],
+                                     language: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a code example as it is generated.
+        
+        Args:
+            question: User's question requesting code
+            context_documents: Relevant documents from vector search
+            language: Optional programming language specification
+            
+        Returns:
+            Async iterator of the same events as generate_answer_stream
+        """
+        extracted = self._extract_documents(context_documents)
+        return self._stream_completion(
+            self._code_messages(question, extracted, language), 0.1, question,
+            [source for source, _ in extracted], self._calculate_confidence(context_documents),
+            namespace=f"code:{language or ''}", error_label="generating code example"
+        )
+    
+    def _answer_messages(self, question: str, extracted: List[Tuple[str, str]]) -> List[Dict[str, str]]:
+        """Build the chat messages for a general Q&A request."""
+        # Prepare context from documents
+        context = self._prepare_context(extracted)
+        
+        return [SYSTEM_MESSAGE, {"role": "user", "content": self._create_user_prompt(question, context)}]
+    
+    def _code_messages(self, question: str, extracted: List[Tuple[str, str]],
+                       language: Optional[str] = None) -> List[Dict[str, str]]:
+        """Build the chat messages for a code generation request."""
+        context = self._prepare_context(extracted)
+        
+        return [
+            _code_system_message(language),
+            {"role": "user", "content": self._create_code_user_prompt(question, context, language)}
+        ]
+    
+    async def _complete(self, messages: List[Dict[str, str]], temperature: float, question: str,
+                        namespace: str) -> Tuple[str, int]:
+        """Run a completion through the response cache and the request limiter; returns (text, tokens_used)."""
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(self.model, messages, temperature)
+            # Semantic lookups embed the question, so keep them off the event loop
+            cached = await asyncio.to_thread(self.cache.get, cache_key, namespace, question)
+            if cached is not None:
+                return cached, 0
+        
+        response = await self.limiter.submit(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=self.max_tokens
+        )
+        
+        content = response.choices[0].message.content
+        if cache_key is not None:
+            await asyncio.to_thread(self.cache.set, cache_key, namespace, question, content)
+        
+        return content, getattr(getattr(response, "usage", None), "total_tokens", 0) or 0
+    
+    async def _stream_completion(self, messages: List[Dict[str, str]], temperature: float, question: str,
+                           sources: List[str], confidence: float, namespace: str,
+                           error_label: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a chat completion as token/done/error events, serving and filling the response cache."""
+        try:
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(self.model, messages, temperature)
+                cached = await asyncio.to_thread(self.cache.get, cache_key, namespace, question)
+                if cached is not None:
+                    yield {"type": "token", "content": cached}
+                    yield self._done_event(sources, confidence, tokens_used=0)
+                    return
+            
+            # A stream occupies a slot of the concurrency cap until it is fully read
+            parts = []
+            tokens_used = 0
+            async with self.limiter.slot():
+                stream = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=self.max_tokens,
+                    stream=True
+                )
+                
+                async for chunk in stream:
+                    content = chunk.choices[0].delta.content if chunk.choices else None
+                    if content:
+                        parts.append(content)
+                        yield {"type": "token", "content": content}
+                    tokens_used = self._stream_tokens_used(chunk) or tokens_used
+            
+            if cache_key is not None:
+                await asyncio.to_thread(self.cache.set, cache_key, namespace, question, "".join(parts))
+            
+            yield self._done_event(sources, confidence, tokens_used)
+            
+        except GROQ_ERRORS as e:
+            logger.error("Error %s: %s", error_label, e)
+            yield {"type": "error", "error": str(e)}
+    
+    def _done_event(self, sources: List[str], confidence: float, tokens_used: int) -> Dict[str, Any]:
+        """Build the final event of a completion stream."""
+        return {
+            "type": "done",
+            "sources": sources,
+            "confidence": confidence,
+            "tokens_used": tokens_used,
+            "model": self.model
+        }
+    
+    async def summarize_documents(self, documents: List[Dict[str, Any]]) -> str:
         """
         Create a summary of multiple documents.
         
@@ -136,116 +323,88 @@ class GroqClient:
                 return "No documents provided for summary."
             
             # Combine document contents
-            combined_content = "\n\n".join([
-                f"Document: {doc.get('metadata', {}).get('source', 'Unknown')}\n{doc.get('content', '')}"
-                for doc in documents[:5]  # Limit to first 5 documents
-            ])
-            
-            system_prompt = """You are a technical documentation summarizer. 
-            Create concise, informative summaries that highlight key concepts, 
-            APIs, and important technical details."""
+            combined_content = "\n\n".join(
+                f"Document: {source}\n{content}"
+                for source, content in self._extract_documents(documents[:5])  # Limit to first 5 documents
+            )
             
             user_prompt = f"Please provide a comprehensive summary of the following technical documentation:\n\n{combined_content}"
             
-            response = self.client.chat.completions.create(
+            response = await self.limiter.submit(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=[SUMMARY_SYSTEM_MESSAGE, {"role": "user", "content": user_prompt}],
                 temperature=0.3,
                 max_tokens=1000
             )
             
             return response.choices[0].message.content
             
-        except Exception as e:
-            logger.error(f"Error summarizing documents: {str(e)}")
+        except GROQ_ERRORS as e:
+            logger.error("Error summarizing documents: %s", e)
             return f"Error creating summary: {str(e)}"
     
-    def _prepare_context(self, documents: List[Dict[str, Any]]) -> str:
-        """Prepare context text from documents."""
-        if not documents:
+    def _extract_documents(self, documents: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """Pull (source, content) pairs out of search results in one pass."""
+        return [
+            ((doc.get('metadata') or _EMPTY).get('source', 'Unknown'), doc.get('content', ''))
+            for doc in documents
+        ]
+    
+    def _prepare_context(self, extracted: List[Tuple[str, str]]) -> str:
+        """Prepare context text from (source, content) pairs."""
+        if not extracted:
             return "No relevant documentation found."
         
+        # Keep the top 5 documents in relevance order, so the character budget
+        # only ever truncates the weakest matches and Document 1 is the best one
         context_parts = []
-        for i, doc in enumerate(documents[:5], 1):  # Limit to top 5 documents
-            content = doc.get('content', '')
-            source = doc.get('metadata', {}).get('source', 'Unknown')
-            
-            context_parts.append(f"[Document {i} - {source}]\n{content}")
+        remaining = MAX_CONTEXT_CHARS
+        for i, (source, content) in enumerate(extracted[:5], 1):
+            part = f"[Document {i} - {source}]\n{content}"[:remaining]
+            context_parts.append(part)
+            remaining -= len(part)
+            if remaining <= 0:
+                break
         
         return "\n\n".join(context_parts)
     
-    def _create_system_prompt(self) -> str:
-        """Create the system prompt for general Q&A."""
-        return """You are a Technical Documentation Assistant, an expert AI that helps developers understand APIs, SDKs, and software products by analyzing their documentation.
-
-Your capabilities:
-- Analyze technical documentation and provide accurate, contextual answers
-- Generate relevant code examples when appropriate
-- Explain complex technical concepts clearly
-- Reference specific parts of the documentation when answering
-
-Guidelines:
-1. Base your answers strictly on the provided documentation context
-2. If information is not available in the context, clearly state this limitation
-3. Provide specific, actionable answers with code examples when relevant
-4. Include references to the source documents when possible
-5. If asked about code, provide functional, well-commented examples
-6. Explain technical concepts in a clear, developer-friendly manner
-
-Always prioritize accuracy and cite your sources from the provided documentation."""
-    
     def _create_user_prompt(self, question: str, context: str) -> str:
-        """Create user prompt with question and context."""
-        return f"""Based on the following technical documentation, please answer this question:
-
-Question: {question}
-
-Documentation Context:
+        """Create user prompt with context first and the question last, keeping the shared prefix long."""
+        return f"""Documentation Context:
 {context}
 
-Please provide a comprehensive answer based on the documentation provided. If you include code examples, make sure they are functional and well-commented."""
-    
-    def _create_code_system_prompt(self, language: Optional[str] = None) -> str:
-        """Create system prompt for code generation."""
-        lang_instruction = f" in {language}" if language else ""
-        
-        return f"""You are a Technical Documentation Assistant specialized in generating code examples{lang_instruction}.
-
-Your responsibilities:
-1. Generate functional, well-commented code examples based on documentation
-2. Ensure code follows best practices and conventions
-3. Include error handling where appropriate
-4. Provide clear explanations of what the code does
-5. Reference the relevant documentation sections
+Based on the technical documentation above, please provide a comprehensive answer to the question below. If you include code examples, make sure they are functional and well-commented.
 
-Guidelines for code generation:
-- Write production-ready code that actually works
-- Include necessary imports and dependencies
-- Add comments explaining key concepts
-- Follow language-specific conventions and best practices
-- Provide complete, runnable examples when possible"""
+Question: {question}"""
     
     def _create_code_user_prompt(self, question: str, context: str, language: Optional[str] = None) -> str:
-        """Create user prompt for code generation."""
+        """Create user prompt for code generation, with context first and the request last."""
         lang_instruction = f" in {language}" if language else ""
         
-        return f"""Based on the following technical documentation, please generate a code example{lang_instruction} that demonstrates:
-
-Request: {question}
-
-Documentation Context:
+        return f"""Documentation Context:
 {context}
 
+Based on the technical documentation above, please generate a code example{lang_instruction} for the request below.
+
 Please provide:
 1. A complete, functional code example
 2. Clear comments explaining each step
 3. Any necessary setup or dependencies
 4. A brief explanation of how the code works
 
-Make sure the code is production-ready and follows best practices."""
+Make sure the code is production-ready and follows best practices.
+
+Request: {question}"""
+    
+    def _stream_tokens_used(self, chunk: Any) -> int:
+        """Return total token usage if this stream chunk carries it (Groq sends it on the last chunk)."""
+        x_groq = getattr(chunk, 'x_groq', None)
+        if x_groq is None:
+            return 0
+        usage = x_groq.get('usage') if isinstance(x_groq, dict) else getattr(x_groq, 'usage', None)
+        if usage is None:
+            return 0
+        return usage.get('total_tokens', 0) if isinstance(usage, dict) else getattr(usage, 'total_tokens', 0)
     
     def _calculate_confidence(self, documents: List[Dict[str, Any]]) -> float:
         """Calculate confidence score based on document relevance."""
@@ -255,3 +414,20 @@ Make sure the code is production-ready and follows best practices."""
         # Average the similarity scores
         scores = [doc.get('score', 0.0) for doc in documents]
         return sum(scores) / len(scores) if scores else 0.0
+
+
+@lru_cache(maxsize=None)
+def get_groq_client(cache: Optional[LLMCache] = None) -> GroqClient:
+    """
+    Return the process-wide GroqClient.
+    
+    Each uvicorn worker is its own process and builds one client, which keeps
+    its pooled connections alive across requests.
+    
+    Args:
+        cache: Optional response cache to attach on first construction
+        
+    Returns:
+        The shared GroqClient for this process and cache
+    """
+    return GroqClient(cache=cache)
@@ -0,0 +1,49 @@
+"""
+Concurrency limit for Groq chat completion requests.
+"""
+
+import asyncio
+from typing import Any, Optional
+
+from groq import AsyncGroq
+
+from .config import settings
+
+
+class RequestLimiter:
+    """
+    Caps the number of Groq chat completion calls in flight at once.
+
+    Groq has no batch endpoint for chat completions, so every request is sent
+    as soon as it arrives; a semaphore only keeps the number of concurrent
+    calls (streamed or not) within the account's rate limits.
+    """
+
+    def __init__(self, client: AsyncGroq, max_concurrency: int = None):
+        self.client = client
+        self.max_concurrency = max_concurrency or settings.groq_max_concurrency
+
+        # Created lazily, bound to the event loop that first uses it
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def slot(self) -> asyncio.Semaphore:
+        """Return the semaphore guarding in-flight calls on the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def submit(self, **kwargs: Any) -> Any:
+        """
+        Send a chat completion request once a slot is free.
+
+        Args:
+            **kwargs: Arguments for ``chat.completions.create``
+
+        Returns:
+            The ChatCompletion response
+        """
+        async with self.slot():
+            return await self.client.chat.completions.create(**kwargs)
@@ -0,0 +1,120 @@
+"""
+Response cache for LLM calls, with exact and semantic (near-duplicate) lookup.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from cachetools import TTLCache
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """
+    Two-tier cache in front of LLM completions.
+
+    The exact tier is keyed on a hash of (model, messages, temperature), so a
+    byte-identical request is answered without calling the API. The semantic
+    tier compares the question's embedding against previously answered
+    questions in the same namespace and reuses the answer when the cosine
+    similarity exceeds the threshold.
+    """
+
+    def __init__(self, embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+                 ttl: int = None, maxsize: int = None, sim_threshold: float = None):
+        self.embed_fn = embed_fn
+        self.ttl = ttl or settings.llm_cache_ttl
+        self.maxsize = maxsize or settings.llm_cache_size
+        self.sim_threshold = sim_threshold or settings.llm_cache_similarity
+
+        self._exact = TTLCache(maxsize=self.maxsize, ttl=self.ttl)
+        # exact key -> (namespace, unit-norm question embedding, response)
+        self._semantic = TTLCache(maxsize=self.maxsize, ttl=self.ttl)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], temperature: float) -> str:
+        """Build the exact-match key for a completion request."""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, namespace: str, question: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Exact-match key from make_key
+            namespace: Partition for semantic matches (e.g. answer vs. code)
+            question: The user's question, used for the semantic tier
+
+        Returns:
+            Cached response text, or None on a miss
+        """
+        with self._lock:
+            response = self._exact.get(key)
+            if response is not None:
+                self.stats["hits"] += 1
+                return response
+            candidates = list(self._semantic.values())
+
+        if candidates and self.embed_fn is not None:
+            response = self._semantic_lookup(namespace, question, candidates)
+            if response is not None:
+                with self._lock:
+                    self.stats["semantic_hits"] += 1
+                return response
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, namespace: str, question: str, response: str) -> None:
+        """Store a response under both the exact key and the question embedding."""
+        embedding = self._embed(question) if self.embed_fn is not None else None
+        with self._lock:
+            self._exact[key] = response
+            if embedding is not None:
+                self._semantic[key] = (namespace, embedding, response)
+
+    def clear(self) -> None:
+        """Drop all cached responses (e.g. after the knowledge base changes)."""
+        with self._lock:
+            self._exact.clear()
+            self._semantic.clear()
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed text as a unit-norm vector, or None if embedding fails."""
+        try:
+            embedding = np.asarray(self.embed_fn(text), dtype=np.float32).ravel()
+        except Exception as e:
+            logger.warning(f"Could not embed question for the LLM cache: {str(e)}")
+            return None
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else None
+
+    def _semantic_lookup(self, namespace: str, question: str, candidates: List[Any]) -> Optional[str]:
+        """Return the response for the most similar cached question above the threshold."""
+        candidates = [entry for entry in candidates if entry[0] == namespace]
+        if not candidates:
+            return None
+
+        query = self._embed(question)
+        if query is None:
+            return None
+
+        similarities = np.stack([entry[1] for entry in candidates]) @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.sim_threshold:
+            return candidates[best][2]
+        return None
@@ -2,23 +2,35 @@
 FastAPI application for the Technical Documentation Assistant.
 """
 
+import asyncio
 import logging
 import os
-from typing import List, Optional
-
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks
+import re
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks, Query
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, StreamingResponse
 from fastapi.requests import Request
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from cachetools import TTLCache
+import orjson
 import uvicorn
 
 from .config import settings
-from .document_processor import DocumentProcessor
-from .vector_database import VectorDatabase, DocumentChunker
-from .groq_client import GroqClient
+from .document_processor import (
+    DocumentProcessor, chunk_worker, ingest_bytes_worker, ingest_file_worker, ingest_paths,
+    init_ingest_worker
+)
+from .vector_database import VectorDatabase
+from .groq_client import get_groq_client
+from .llm_cache import LLMCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,7 +40,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
-    description="AI-driven system for parsing technical documentation and providing contextual answers"
+    description="AI-driven system for parsing technical documentation and providing contextual answers",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -40,22 +53,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Directory jobs kept for polling, and for how long (seconds)
+DIRECTORY_JOB_HISTORY = 128
+DIRECTORY_JOB_TTL = 24 * 3600
+
 # Initialize components
 doc_processor = DocumentProcessor()
-vector_db = VectorDatabase()
-chunker = DocumentChunker()
-groq_client = GroqClient()
+vector_db = VectorDatabase(warmup=True)
+llm_cache = LLMCache(embed_fn=vector_db.embed_query)
+# Full responses keyed by normalized question, so exact repeats skip the embedding too
+answer_cache = TTLCache(maxsize=settings.llm_cache_size, ttl=settings.llm_cache_ttl)
+# Progress of background directory ingests, polled by job id
+directory_jobs = TTLCache(maxsize=DIRECTORY_JOB_HISTORY, ttl=DIRECTORY_JOB_TTL)
+# Strong references so running background jobs aren't garbage collected
+_background_tasks = set()
+groq_client = get_groq_client(llm_cache)
+
+# Parsing and chunking run in worker processes for real CPU parallelism;
+# only the resulting chunks come back, and embedding stays in this process
+process_pool: Optional[ProcessPoolExecutor] = None
 
 # Set up templates and static files
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
+# Upper bounds on per-request work: question length and documents retrieved
+MAX_QUESTION_LENGTH = 4000
+MAX_RESULTS = 20
+
+
 # Pydantic models
 class QueryRequest(BaseModel):
-    question: str
+    question: str = Field(..., min_length=1, max_length=MAX_QUESTION_LENGTH)
     language: Optional[str] = None
-    max_results: Optional[int] = 5
+    max_results: Optional[int] = Field(default=5, ge=1, le=MAX_RESULTS)
 
 
 class QueryResponse(BaseModel):
@@ -73,10 +105,216 @@ class DocumentUploadResponse(BaseModel):
     total_chunks: int
 
 
+class DirectoryJobStatus(BaseModel):
+    job_id: str
+    status: str
+    message: str
+    parsed_files: int
+    processed_files: int
+    total_chunks: int
+
+
 class DatabaseStats(BaseModel):
     total_documents: int
     collection_name: str
     embedding_model: str
+    query_cache: Optional[Dict[str, Optional[int]]] = None
+    llm_cache: Optional[Dict[str, int]] = None
+
+
+# Maximum number of uploaded files parsed and chunked at the same time
+UPLOAD_CONCURRENCY = 8
+
+# Number of chunks embedded and written to the vector database per call
+ADD_BATCH_SIZE = 256
+
+# Batches allowed to wait for or be in a vector database write at once;
+# ingestion pauses beyond this so parsed chunks don't pile up in memory
+MAX_PENDING_WRITES = 2
+
+# Characters of each chunk shown in search results
+PREVIEW_CHARS = 200
+
+
+# Answer returned when the knowledge base has nothing relevant to a question
+NO_DOCUMENTS_ANSWER = (
+    "I couldn't find any relevant documentation for your question. "
+    "Please make sure you have uploaded some documentation files first."
+)
+
+
+# Questions answered directly, without retrieval or an LLM call
+_PUNCTUATION_ONLY_RE = re.compile(r"^[\W_]*$")
+TOO_SHORT_ANSWER = "Please ask a question about your documentation."
+# Small talk answered with a canned reply, keyed by normalized input
+SMALL_TALK_ANSWERS = {
+    **dict.fromkeys(
+        ("hi", "hello", "hey", "yo", "hiya", "good morning", "good afternoon", "good evening"),
+        "Hello! Ask me anything about the documentation you've uploaded."
+    ),
+    **dict.fromkeys(
+        ("thanks", "thank you", "thx"),
+        "You're welcome! Let me know if you have more questions about your documentation."
+    ),
+    **dict.fromkeys(("ok", "okay"), "Great! Ask another question whenever you're ready."),
+    **dict.fromkeys(("bye", "goodbye"), "Goodbye! Come back anytime you have questions about your documentation.")
+}
+
+
+def _normalize_question(question: str) -> str:
+    """Lowercase a question and collapse its whitespace."""
+    return " ".join(question.lower().split())
+
+
+def _direct_answer(normalized: str) -> Optional[str]:
+    """Return a canned answer for trivial input, or None if the question needs the full pipeline."""
+    small_talk = SMALL_TALK_ANSWERS.get(normalized.rstrip("!.?, "))
+    if small_talk is not None:
+        return small_talk
+    if len(normalized) < 3 or _PUNCTUATION_ONLY_RE.match(normalized):
+        return TOO_SHORT_ANSWER
+    return None
+
+
+def _clear_answer_caches() -> None:
+    """Drop cached answers after the knowledge base changes."""
+    llm_cache.clear()
+    answer_cache.clear()
+
+
+def _preview(content: str) -> str:
+    """Truncate chunk content for search results."""
+    return content if len(content) <= PREVIEW_CHARS else content[:PREVIEW_CHARS] + "..."
+
+
+def _wants_code(query: QueryRequest) -> bool:
+    """Whether a query should be answered with a code example."""
+    question = query.question.lower()
+    return bool(query.language) or "code" in question or "example" in question
+
+
+async def _direct_events(answer: str) -> AsyncIterator[Dict]:
+    """Stream events for an answer that needs no LLM call."""
+    yield {"type": "token", "content": answer}
+    yield {"type": "done", "sources": [], "confidence": 0.0, "tokens_used": 0, "model": settings.groq_model}
+
+
+def _new_process_pool() -> ProcessPoolExecutor:
+    """Create the ingest process pool."""
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=init_ingest_worker)
+
+
+def _replace_broken_pool(broken: ProcessPoolExecutor) -> None:
+    """Swap in a fresh ingest pool, unless another task already replaced this broken one."""
+    global process_pool
+    if process_pool is broken:
+        logger.warning("Ingest worker process died; restarting the process pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        process_pool = _new_process_pool()
+
+
+async def _in_process_pool(fn, *args):
+    """
+    Run a picklable function in the ingest process pool.
+    
+    A worker dying (e.g. a crashing PDF parser or the OOM killer) breaks the
+    whole pool, so it is replaced and the call retried once; if the retry
+    fails too, only this call raises and later requests get a fresh pool.
+    """
+    for attempt in range(2):
+        pool = process_pool
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            _replace_broken_pool(pool)
+            if attempt:
+                raise
+
+
+async def _chunk_result(result: Dict) -> List[Dict]:
+    """Chunk a processed document in the process pool; empty documents yield no chunks."""
+    if not result['content']:
+        return []
+    return await _in_process_pool(chunk_worker, result)
+
+
+async def _completed(tasks: List[Awaitable[List[Dict]]]) -> AsyncIterator[List[Dict]]:
+    """Yield the chunks of each document as its task finishes."""
+    for next_chunks in asyncio.as_completed(tasks):
+        yield await next_chunks
+
+
+def _ingest_directory(directory_path: str) -> AsyncIterator[List[Dict]]:
+    """
+    Stream the chunks of every supported file under a directory.
+    
+    Files are parsed and chunked in the process pool as the directory walk
+    discovers them, one consumer per CPU.
+    
+    Args:
+        directory_path: Directory to ingest
+        
+    Returns:
+        Async iterator of per-file chunk lists, in completion order
+    """
+    async def ingest(path: str) -> List[Dict]:
+        return await _in_process_pool(ingest_file_worker, path)
+    
+    return ingest_paths(doc_processor.iter_supported_files(directory_path), ingest, os.cpu_count() or 1)
+
+
+async def _store_chunks(chunk_lists: AsyncIterator[List[Dict]], progress: Optional[Dict] = None) -> Tuple[int, int]:
+    """
+    Embed and store chunks in sub-batches while the remaining documents are still being processed.
+    
+    Args:
+        chunk_lists: Async iterator of the chunks of each document
+        progress: Optional dict updated with parsed_files, processed_files
+            and total_chunks as documents arrive
+        
+    Returns:
+        Tuple of (number of documents with chunks, total number of chunks)
+    """
+    processed_files = 0
+    total_chunks = 0
+    pending: List[Dict] = []
+    writes = deque()
+    # Writes run one at a time, but overlap with parsing of later documents
+    write_lock = asyncio.Lock()
+    
+    async def write(batch: List[Dict]) -> None:
+        async with write_lock:
+            await asyncio.to_thread(vector_db.add_documents, batch)
+    
+    async for chunks in chunk_lists:
+        if progress is not None:
+            progress["parsed_files"] += 1
+        if not chunks:
+            continue
+        processed_files += 1
+        total_chunks += len(chunks)
+        if progress is not None:
+            progress.update(processed_files=processed_files, total_chunks=total_chunks)
+        pending.extend(chunks)
+        if len(pending) >= ADD_BATCH_SIZE:
+            writes.append(asyncio.create_task(write(pending)))
+            pending = []
+            # Backpressure: let the oldest write finish before reading more documents
+            while len(writes) > MAX_PENDING_WRITES:
+                await writes.popleft()
+    
+    if pending:
+        writes.append(asyncio.create_task(write(pending)))
+    await asyncio.gather(*writes)
+    
+    return processed_files, total_chunks
+
+
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
+    """Report unexpected errors as JSON with a detail message, like HTTPException does."""
+    # Starlette re-raises after responding, so the server logs the traceback
+    return ORJSONResponse(status_code=500, content={"detail": f"Internal server error: {exc}"})
 
 
 # Routes
@@ -86,62 +324,124 @@ async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
-@app.post("/api/query", response_model=QueryResponse)
-async def query_documentation(query: QueryRequest):
+@app.post("/api/query", response_model=None, responses={200: {"model": QueryResponse}})
+async def query_documentation(query: QueryRequest) -> ORJSONResponse:
     """
     Query the documentation with a natural language question.
+    
+    The response is built as a plain dict and serialized directly, skipping
+    outbound model validation; QueryResponse documents its shape.
     """
-    try:
-        if not query.question.strip():
-            raise HTTPException(status_code=400, detail="Question cannot be empty")
-        
-        # Search for relevant documents
-        relevant_docs = vector_db.search(
-            query=query.question,
-            n_results=query.max_results or 5
+    if not query.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    
+    # Answer trivial input and exact repeats without touching the database or LLM
+    normalized = _normalize_question(query.question)
+    direct = _direct_answer(normalized)
+    if direct is not None:
+        return ORJSONResponse({
+            "answer": direct,
+            "sources": [],
+            "confidence": 0.0,
+            "tokens_used": 0,
+            "model": settings.groq_model
+        })
+    
+    cache_key = (normalized, query.language, query.max_results)
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        return ORJSONResponse(cached)
+    
+    # Search for relevant documents; embedding and the Chroma query block, so run them off the loop
+    relevant_docs = await asyncio.to_thread(
+        vector_db.search,
+        query=query.question,
+        n_results=query.max_results or 5
+    )
+    
+    if not relevant_docs:
+        return ORJSONResponse({
+            "answer": NO_DOCUMENTS_ANSWER,
+            "sources": [],
+            "confidence": 0.0,
+            "tokens_used": 0,
+            "model": settings.groq_model
+        })
+    
+    # Generate answer
+    if _wants_code(query):
+        # Generate code example
+        result = await groq_client.generate_code_example(
+            question=query.question,
+            context_documents=relevant_docs,
+            language=query.language
         )
-        
-        if not relevant_docs:
-            return QueryResponse(
-                answer="I couldn't find any relevant documentation for your question. Please make sure you have uploaded some documentation files first.",
-                sources=[],
-                confidence=0.0,
-                tokens_used=0,
-                model=settings.groq_model
-            )
-        
-        # Generate answer
-        if query.language or "code" in query.question.lower() or "example" in query.question.lower():
-            # Generate code example
-            result = groq_client.generate_code_example(
-                question=query.question,
-                context_documents=relevant_docs,
-                language=query.language
-            )
-            return QueryResponse(
-                answer=result["code_example"],
-                sources=result["sources"],
-                confidence=vector_db.search(query.question, 1)[0].get('score', 0.0) if relevant_docs else 0.0,
-                tokens_used=result["tokens_used"],
-                model=result["model"]
-            )
-        else:
-            # Generate regular answer
-            result = groq_client.generate_answer(
-                question=query.question,
-                context_documents=relevant_docs
-            )
-            return QueryResponse(
-                answer=result["answer"],
-                sources=result["sources"],
-                confidence=result["confidence"],
-                tokens_used=result["tokens_used"],
-                model=result["model"]
-            )
+        response = {
+            "answer": result["code_example"],
+            "sources": result["sources"],
+            "confidence": result["confidence"],
+            "tokens_used": result["tokens_used"],
+            "model": result["model"]
+        }
+    else:
+        # Generate regular answer
+        result = await groq_client.generate_answer(
+            question=query.question,
+            context_documents=relevant_docs
+        )
+        response = {
+            "answer": result["answer"],
+            "sources": result["sources"],
+            "confidence": result["confidence"],
+            "tokens_used": result["tokens_used"],
+            "model": result["model"]
+        }
     
-    except Exception as e:
-        logger.error(f"Error processing query: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+    # Failed generations come back without sources; don't cache them
+    if response["sources"]:
+        answer_cache[cache_key] = response
+    return ORJSONResponse(response)
+
+
+@app.post("/api/query/stream")
+async def query_documentation_stream(query: QueryRequest):
+    """
+    Query the documentation and stream the answer as server-sent events.
+    
+    Each event is a JSON object: "token" events carry answer text as it is
+    generated, and a final "done" event carries sources, confidence,
+    tokens_used and model ("error" replaces it on failure).
+    """
+    if not query.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    
+    direct = _direct_answer(_normalize_question(query.question))
+    relevant_docs = [] if direct is not None else await asyncio.to_thread(
+        vector_db.search,
+        query=query.question,
+        n_results=query.max_results or 5
+    )
+    
+    if direct is not None:
+        events = _direct_events(direct)
+    elif not relevant_docs:
+        events = _direct_events(NO_DOCUMENTS_ANSWER)
+    elif _wants_code(query):
+        events = groq_client.generate_code_example_stream(
+            question=query.question,
+            context_documents=relevant_docs,
+            language=query.language
+        )
+    else:
+        events = groq_client.generate_answer_stream(
+            question=query.question,
+            context_documents=relevant_docs
+        )
+    
+    return StreamingResponse(
+        (b"data: " + orjson.dumps(event) + b"\n\n" async for event in events),
+        media_type="text/event-stream"
+    )
 
 
 @app.post("/api/upload", response_model=DocumentUploadResponse)
@@ -153,98 +453,102 @@ async def upload_documents(
     """
     Upload and process documentation files or URLs.
     """
+    # Validate that at least one input is provided
+    if not files and not urls:
+        raise HTTPException(
+            status_code=400, 
+            detail="Please provide either files to upload or URLs to process"
+        )
+    
+    semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+    
+    async def process_upload(file: UploadFile) -> List[Dict]:
+        async with semaphore:
+            # Parse and chunk straight from memory in a worker process
+            content = await file.read()
+            return await _in_process_pool(ingest_bytes_worker, content, file.filename)
+    
+    async def process_link(url: str) -> List[Dict]:
+        async with semaphore:
+            result = await asyncio.to_thread(doc_processor.process_url, url)
+            return await _chunk_result(result)
+    
+    tasks = [process_upload(file) for file in files or [] if file.filename]
+    
+    # Process URLs if provided
+    if urls:
+        tasks.extend(process_link(url.strip()) for url in urls.split('\n') if url.strip())
+    
+    processed_files, total_chunks = await _store_chunks(_completed(tasks))
+    
+    # Cached answers may be stale now that the knowledge base changed
+    if processed_files:
+        _clear_answer_caches()
+    
+    return DocumentUploadResponse(
+        success=True,
+        message=f"Successfully processed {processed_files} files/URLs with {total_chunks} chunks",
+        processed_files=processed_files,
+        total_chunks=total_chunks
+    )
+
+
+async def _run_directory_job(job: Dict, directory_path: str) -> None:
+    """Ingest a directory in the background, recording progress and outcome on the job."""
     try:
-        # Validate that at least one input is provided
-        if not files and not urls:
-            raise HTTPException(
-                status_code=400, 
-                detail="Please provide either files to upload or URLs to process"
-            )
+        processed_files, total_chunks = await _store_chunks(_ingest_directory(directory_path), progress=job)
         
-        processed_files = 0
-        total_chunks = 0
+        if processed_files:
+            _clear_answer_caches()
         
-        # Process uploaded files
-        if files:
-            for file in files:
-                if file.filename:
-                    # Save uploaded file temporarily
-                    temp_path = f"temp_{file.filename}"
-                    with open(temp_path, "wb") as buffer:
-                        content = await file.read()
-                        buffer.write(content)
-                    
-                    # Process the file
-                    result = doc_processor.process_file(temp_path)
-                    if result['content']:
-                        # Chunk the document
-                        chunks = chunker.chunk_document(result)
-                        if chunks:
-                            # Add to vector database
-                            vector_db.add_documents(chunks)
-                            processed_files += 1
-                            total_chunks += len(chunks)
-                    
-                    # Clean up temp file
-                    os.remove(temp_path)
-        
-        # Process URLs if provided
-        if urls:
-            url_list = [url.strip() for url in urls.split('\n') if url.strip()]
-            for url in url_list:
-                result = doc_processor.process_url(url)
-                if result['content']:
-                    chunks = chunker.chunk_document(result)
-                    if chunks:
-                        vector_db.add_documents(chunks)
-                        processed_files += 1
-                        total_chunks += len(chunks)
-        
-        return DocumentUploadResponse(
-            success=True,
-            message=f"Successfully processed {processed_files} files/URLs with {total_chunks} chunks",
-            processed_files=processed_files,
-            total_chunks=total_chunks
+        job.update(
+            status="completed",
+            message=f"Successfully processed {processed_files} files from directory with {total_chunks} chunks"
         )
     
     except Exception as e:
-        logger.error(f"Error uploading documents: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error uploading documents: {str(e)}")
+        # A background job has no caller to propagate to; record the failure instead
+        logger.exception("Error processing directory %s", directory_path)
+        job.update(status="failed", message=f"Error processing directory: {e}")
 
 
-@app.post("/api/upload-directory")
+@app.post("/api/upload-directory", response_model=DirectoryJobStatus, status_code=202)
 async def upload_directory(directory_path: str = Form(...)):
     """
-    Process all supported files in a directory.
+    Start processing all supported files in a directory.
+    
+    Files are ingested in the background as they are discovered; poll
+    /api/upload-directory/{job_id} for progress.
     """
-    try:
-        if not os.path.exists(directory_path):
-            raise HTTPException(status_code=400, detail="Directory path does not exist")
-        
-        # Process directory
-        results = doc_processor.process_directory(directory_path)
-        
-        processed_files = 0
-        total_chunks = 0
-        
-        for result in results:
-            if result['content']:
-                chunks = chunker.chunk_document(result)
-                if chunks:
-                    vector_db.add_documents(chunks)
-                    processed_files += 1
-                    total_chunks += len(chunks)
-        
-        return DocumentUploadResponse(
-            success=True,
-            message=f"Successfully processed {processed_files} files from directory with {total_chunks} chunks",
-            processed_files=processed_files,
-            total_chunks=total_chunks
-        )
+    if not os.path.isdir(directory_path):
+        raise HTTPException(status_code=400, detail="Directory path does not exist")
     
-    except Exception as e:
-        logger.error(f"Error processing directory: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing directory: {str(e)}")
+    job_id = uuid.uuid4().hex
+    job = directory_jobs[job_id] = {
+        "job_id": job_id,
+        "status": "running",
+        "message": f"Processing {directory_path}",
+        "parsed_files": 0,
+        "processed_files": 0,
+        "total_chunks": 0
+    }
+    
+    task = asyncio.create_task(_run_directory_job(job, directory_path))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    
+    return job
+
+
+@app.get("/api/upload-directory/{job_id}", response_model=DirectoryJobStatus)
+async def get_directory_job(job_id: str):
+    """
+    Get the progress of a directory upload.
+    """
+    job = directory_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown directory job")
+    return job
 
 
 @app.get("/api/stats", response_model=DatabaseStats)
@@ -252,12 +556,8 @@ async def get_database_stats():
     """
     Get statistics about the current knowledge base.
     """
-    try:
-        stats = vector_db.get_collection_stats()
-        return DatabaseStats(**stats)
-    except Exception as e:
-        logger.error(f"Error getting stats: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error getting stats: {str(e)}")
+    stats = vector_db.get_collection_stats()
+    return DatabaseStats(**stats, llm_cache=dict(llm_cache.stats))
 
 
 @app.delete("/api/reset")
@@ -265,38 +565,48 @@ async def reset_database():
     """
     Reset the entire knowledge base (use with caution).
     """
-    try:
-        success = vector_db.reset_database()
-        if success:
-            return {"success": True, "message": "Database reset successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to reset database")
-    except Exception as e:
-        logger.error(f"Error resetting database: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error resetting database: {str(e)}")
+    success = vector_db.reset_database()
+    if success:
+        _clear_answer_caches()
+        return {"success": True, "message": "Database reset successfully"}
+    else:
+        raise HTTPException(status_code=500, detail="Failed to reset database")
 
 
 @app.get("/api/search")
-async def search_documents(q: str, limit: int = 5):
+async def search_documents(q: str = Query(..., max_length=MAX_QUESTION_LENGTH),
+                           limit: int = Query(5, ge=1, le=MAX_RESULTS)):
     """
     Search for documents without generating an answer.
     """
-    try:
-        results = vector_db.search(query=q, n_results=limit)
-        return {
-            "query": q,
-            "results": [
-                {
-                    "content": doc["content"][:200] + "..." if len(doc["content"]) > 200 else doc["content"],
-                    "source": doc["metadata"].get("source", "Unknown"),
-                    "score": doc["score"]
-                }
-                for doc in results
-            ]
-        }
-    except Exception as e:
-        logger.error(f"Error searching documents: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error searching documents: {str(e)}")
+    results = await asyncio.to_thread(vector_db.search, query=q, n_results=limit)
+    # Returned as-is: orjson serializes the plain dicts without jsonable_encoder
+    return ORJSONResponse({
+        "query": q,
+        "results": [
+            {
+                "content": _preview(doc["content"]),
+                "source": doc["metadata"].get("source", "Unknown"),
+                "score": doc["score"]
+            }
+            for doc in results
+        ]
+    })
+
+
+@app.on_event("startup")
+async def startup():
+    """Start the document ingest process pool."""
+    global process_pool
+    process_pool = _new_process_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close the Groq client's connections and the ingest pool."""
+    await groq_client.client.close()
+    if process_pool is not None:
+        process_pool.shutdown(cancel_futures=True)
 
 
 # Health check
@@ -0,0 +1,87 @@
+"""
+Process-local HNSW mirror of the collection's vectors for low-latency search.
+"""
+
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# hnswlib ships with chromadb (as chroma-hnswlib), but stay importable without it
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# Initial element capacity; the index doubles whenever it fills up
+INITIAL_CAPACITY = 1024
+
+
+class MemoryIndex:
+    """
+    In-RAM hnswlib index holding a copy of every stored embedding.
+
+    Queries run directly against the index in this process, skipping
+    Chroma's query planning and SQLite round trips; Chroma stays the source
+    of truth and is only asked for documents and metadata by ID. Chroma's
+    string IDs are mapped to the integer labels hnswlib requires.
+    """
+
+    def __init__(self, dim: int, space: str, m: int, ef_construction: int, ef_search: int):
+        if hnswlib is None:
+            raise ImportError("hnswlib is required for the in-memory index")
+        self.dim = dim
+        self.space = space
+        self._index = hnswlib.Index(space=space, dim=dim)
+        self._index.init_index(max_elements=INITIAL_CAPACITY, ef_construction=ef_construction, M=m)
+        self._index.set_ef(ef_search)
+        self._labels: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, ids: Sequence[str], embeddings: np.ndarray) -> None:
+        """
+        Insert or replace vectors.
+
+        Args:
+            ids: Chroma IDs of the vectors
+            embeddings: Array of shape (len(ids), dim)
+        """
+        if not len(ids):
+            return
+        with self._lock:
+            labels = []
+            for doc_id in ids:
+                label = self._labels.get(doc_id)
+                if label is None:
+                    label = len(self._ids)
+                    self._labels[doc_id] = label
+                    self._ids.append(doc_id)
+                labels.append(label)
+
+            capacity = self._index.get_max_elements()
+            if len(self._ids) > capacity:
+                self._index.resize_index(max(len(self._ids), capacity * 2))
+            self._index.add_items(np.asarray(embeddings, dtype=np.float32), labels)
+
+    def query(self, embedding: np.ndarray, k: int) -> Tuple[List[str], List[float]]:
+        """
+        Find the nearest stored vectors.
+
+        Args:
+            embedding: 1D query vector
+            k: Number of neighbours
+
+        Returns:
+            Tuple of (Chroma IDs, distances), best first; distances are in the
+            index space (cosine distance or squared L2), like Chroma's
+        """
+        with self._lock:
+            k = min(k, len(self._ids))
+            if k == 0:
+                return [], []
+            labels, distances = self._index.knn_query(embedding[None, :], k=k)
+            return [self._ids[label] for label in labels[0]], distances[0].tolist()
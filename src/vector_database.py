@@ -2,26 +2,214 @@
 Vector database management using ChromaDB for semantic search and retrieval.
 """
 
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import os
+import threading
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import chromadb
+import numpy as np
 from chromadb.config import Settings as ChromaSettings
 from sentence_transformers import SentenceTransformer
-import uuid
+from sentence_transformers.util import batch_to_device
+import torch
 
 from .config import settings
+from .memory_index import MemoryIndex
 
 logger = logging.getLogger(__name__)
 
+# Texts per forward pass when embedding documents
+ENCODE_BATCH_SIZE = 64
+
+# Rows per Chroma write or ID lookup, bounding each transaction and the
+# number of SQLite bound variables per query
+UPSERT_BATCH_SIZE = 1000
+
+# Rows read per page when mirroring the collection into the in-memory index
+MIRROR_PAGE_SIZE = 1000
+
+# Chroma fields fetched by a search unless the caller asks for fewer
+DEFAULT_SEARCH_FIELDS = ('documents', 'metadatas', 'distances')
+
+# Document type implied by a source's file extension; URLs without one are
+# 'web' and anything else is 'text'
+DOC_TYPES_BY_EXTENSION = {
+    '.md': 'markdown',
+    '.markdown': 'markdown',
+    '.html': 'html',
+    '.htm': 'html',
+    '.pdf': 'pdf',
+    '.json': 'config',
+    '.yaml': 'config',
+    '.yml': 'config'
+}
+
+# Sentence endings a chunk boundary may snap to, in order of preference
+SENTENCE_ENDINGS = ('. ', '.\n', '!\n', '?\n')
+
+# Number of distinct query embeddings memoized per process
+QUERY_CACHE_SIZE = 1024
+
+# Process-wide embedding models by name, each loaded on first use and
+# shared by every VectorDatabase in the process
+_MODEL_CACHE: Dict[str, SentenceTransformer] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+def _select_device() -> str:
+    """Pick the torch device for embeddings: the configured one, else CUDA, then Apple MPS, then CPU."""
+    if settings.embedding_device:
+        return settings.embedding_device
+    if torch.cuda.is_available():
+        return "cuda"
+    mps = getattr(torch.backends, "mps", None)
+    if mps is not None and mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def _get_model(name: str) -> SentenceTransformer:
+    """Return the shared embedding model with the given name, loading it exactly once."""
+    model = _MODEL_CACHE.get(name)
+    if model is None:
+        with _MODEL_CACHE_LOCK:
+            model = _MODEL_CACHE.get(name)
+            if model is None:
+                device = _select_device()
+                model = SentenceTransformer(name, device=device)
+                if device.startswith("cuda") and settings.embedding_fp16:
+                    # Half precision runs on tensor cores; outputs are cast back to float32
+                    model.half()
+                elif device == "cpu":
+                    torch.set_num_threads(settings.embedding_threads or os.cpu_count() or 1)
+                logger.info(f"Loaded embedding model {name} on {device}")
+                _MODEL_CACHE[name] = model
+    return model
+
+
+def _encode_texts(model: SentenceTransformer, texts: List[str]) -> np.ndarray:
+    """Embed texts in batched forward passes as a contiguous float32 (n, dim) array of unit-norm vectors."""
+    with torch.inference_mode():
+        embeddings = model.encode(
+            texts,
+            batch_size=ENCODE_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+    return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+
+def _encode_single(model: SentenceTransformer, text: str) -> np.ndarray:
+    """
+    Embed one text with a direct forward pass through the model's modules.
+    
+    Produces the same unit-norm vector as ``_encode_texts`` for a single
+    text, without ``encode``'s per-call length sorting, batching loop and
+    output conversions, which dominate the overhead for short queries.
+    
+    Args:
+        model: Embedding model
+        text: Text to embed
+        
+    Returns:
+        1D contiguous float32 array
+    """
+    features = batch_to_device(model.tokenize([text]), model.device)
+    with torch.inference_mode():
+        embedding = model(features)['sentence_embedding']
+        embedding = torch.nn.functional.normalize(embedding, p=2, dim=1)
+    return np.ascontiguousarray(embedding[0].float().cpu().numpy())
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _embed_query_cached(model_id: str, text: str) -> np.ndarray:
+    """
+    Embed a query, memoizing the result.
+    
+    Args:
+        model_id: Name of the embedding model; part of the key so vectors
+            from another model are never served
+        text: Query text
+        
+    Returns:
+        The 1D float32 embedding, marked read-only since it is shared
+        between callers
+    """
+    embedding = _encode_single(_get_model(model_id), text)
+    embedding.flags.writeable = False
+    return embedding
+
+
+def _optimize_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert metadata values to the scalar types Chroma stores natively.
+    
+    Chroma only accepts str, int, float and bool values, so lists, tuples
+    and sets become comma-separated strings, numpy scalars become Python
+    numbers and None values are dropped.
+    
+    Args:
+        metadata: Chunk metadata
+        
+    Returns:
+        New metadata dict safe to pass to Chroma
+    """
+    optimized = {}
+    for key, value in metadata.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set, frozenset)):
+            value = ','.join(map(str, value))
+        elif isinstance(value, np.generic):
+            value = value.item()
+        optimized[key] = value
+    return optimized
+
+
+def _chunk_id(source: str, content: str) -> str:
+    """
+    Build a stable ID for a chunk from its source and content.
+    
+    Args:
+        source: Document source the chunk came from
+        content: Chunk text
+        
+    Returns:
+        32 character hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(source.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(content.encode('utf-8'))
+    return digest.hexdigest()
+
 
 class VectorDatabase:
     """Manages the vector database for semantic search and retrieval."""
     
-    def __init__(self):
+    def __init__(self, preload_model: bool = True, warmup: bool = False):
+        """
+        Args:
+            preload_model: Load the embedding model now rather than on the
+                first add or search, so the app pays the load at boot
+            warmup: Run one throwaway search after opening the collection so
+                the first real query does not pay for paging in the index
+        """
         self.client = None
         self.collection = None
-        self.embedding_model = None
+        self.preload_model = preload_model
+        self._memory_index: Optional[MemoryIndex] = None
         self._initialize()
+        if warmup:
+            self.warm_up()
+    
+    @property
+    def embedding_model(self) -> SentenceTransformer:
+        """The shared embedding model, loaded on first access."""
+        return _get_model(settings.embedding_model)
     
     def _initialize(self):
         """Initialize ChromaDB client and collection."""
@@ -36,13 +224,33 @@ class VectorDatabase:
             )
             
             # Initialize embedding model
-            self.embedding_model = SentenceTransformer(settings.embedding_model)
+            if self.preload_model:
+                _get_model(settings.embedding_model)
             
-            # Get or create collection
-            self.collection = self.client.get_or_create_collection(
-                name="documentation_chunks",
-                metadata={"description": "Technical documentation chunks with embeddings"}
-            )
+            # Get or create collection. HNSW parameters are fixed when the
+            # index is built, so an existing collection is opened as-is rather
+            # than having its metadata rewritten
+            try:
+                self.collection = self.client.get_collection(name="documentation_chunks")
+            except ValueError:
+                self.collection = self.client.create_collection(
+                    name="documentation_chunks",
+                    metadata={
+                        "description": "Technical documentation chunks with embeddings",
+                        "hnsw:space": "cosine",
+                        "hnsw:construction_ef": settings.hnsw_construction_ef,
+                        "hnsw:M": settings.hnsw_m,
+                        "hnsw:search_ef": settings.hnsw_search_ef,
+                        "hnsw:num_threads": os.cpu_count() or 1
+                    }
+                )
+            # Collections created before cosine became the default keep L2
+            self._space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+            
+            self._use_memory_index = settings.memory_index
+            self._memory_index = None
+            if self._use_memory_index:
+                self._load_memory_index()
             
             logger.info(f"Vector database initialized with {self.collection.count()} documents")
             
@@ -50,10 +258,52 @@ class VectorDatabase:
             logger.error(f"Error initializing vector database: {str(e)}")
             raise
     
+    def warm_up(self) -> None:
+        """Run a throwaway search to load the HNSW index and the model's lazy paths before real traffic."""
+        try:
+            if self.collection.count() > 0:
+                list(self.isearch("warmup", n_results=1))
+                logger.info("Vector database warmed up")
+        except Exception as e:
+            logger.warning(f"Vector database warm-up failed: {str(e)}")
+    
+    def _load_memory_index(self) -> None:
+        """Copy every stored embedding into the in-memory index, a page at a time."""
+        offset = 0
+        while True:
+            page = self.collection.get(include=['embeddings'], limit=MIRROR_PAGE_SIZE, offset=offset)
+            if not page['ids']:
+                break
+            self._mirror(page['ids'], np.asarray(page['embeddings'], dtype=np.float32))
+            offset += len(page['ids'])
+        if self._memory_index is not None:
+            logger.info(f"In-memory index loaded with {len(self._memory_index)} vectors")
+    
+    def _mirror(self, ids: List[str], embeddings: np.ndarray) -> None:
+        """Add vectors to the in-memory index, creating it on first use."""
+        if self._memory_index is None:
+            try:
+                self._memory_index = MemoryIndex(
+                    dim=embeddings.shape[1],
+                    space=self._space,
+                    m=settings.hnsw_m,
+                    ef_construction=settings.hnsw_construction_ef,
+                    ef_search=settings.hnsw_search_ef
+                )
+            except ImportError as e:
+                logger.warning(f"In-memory index disabled: {str(e)}")
+                self._use_memory_index = False
+                return
+        self._memory_index.add(ids, embeddings)
+    
     def add_documents(self, documents: List[Dict[str, Any]]) -> bool:
         """
         Add documents to the vector database.
         
+        Each chunk is keyed by a hash of its source and content, so chunks
+        already stored (or repeated within the batch) are skipped before
+        embedding and re-ingesting a document does not create duplicates.
+        
         Args:
             documents: List of document dictionaries with content and metadata
             
@@ -67,24 +317,22 @@ class VectorDatabase:
             
             # Prepare data for ChromaDB
             ids = []
-            embeddings = []
             metadatas = []
             documents_text = []
+            seen_ids = set()
             
             for doc in documents:
-                # Generate unique ID
-                doc_id = str(uuid.uuid4())
-                ids.append(doc_id)
-                
-                # Extract content and create embedding
                 content = doc.get('content', '')
                 if not content:
                     logger.warning(f"Empty content for document: {doc.get('source', 'unknown')}")
                     continue
                 
-                # Create embedding
-                embedding = self.embedding_model.encode(content).tolist()
-                embeddings.append(embedding)
+                # Deterministic ID so identical chunks collapse to one entry
+                doc_id = _chunk_id(doc.get('source', ''), content)
+                if doc_id in seen_ids:
+                    continue
+                seen_ids.add(doc_id)
+                ids.append(doc_id)
                 
                 # Prepare metadata
                 metadata = {
@@ -95,29 +343,55 @@ class VectorDatabase:
                     'doc_type': doc.get('doc_type', 'unknown'),
                     **doc.get('metadata', {})
                 }
-                metadatas.append(metadata)
+                metadatas.append(_optimize_metadata(metadata))
                 documents_text.append(content)
             
             if not ids:
                 logger.warning("No valid documents to add after processing")
                 return False
             
-            # Add to ChromaDB
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                documents=documents_text,
-                metadatas=metadatas
-            )
+            # Drop chunks that are already stored before paying for embeddings;
+            # looked up in the same slices as the writes to stay under SQLite's
+            # bound-variable limit
+            existing = set()
+            for s in range(0, len(ids), UPSERT_BATCH_SIZE):
+                existing.update(self.collection.get(ids=ids[s:s + UPSERT_BATCH_SIZE], include=[])['ids'])
+            if existing:
+                keep = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+                ids = [ids[i] for i in keep]
+                metadatas = [metadatas[i] for i in keep]
+                documents_text = [documents_text[i] for i in keep]
+                if not ids:
+                    logger.info(f"All {len(existing)} documents already in vector database")
+                    return True
             
-            logger.info(f"Added {len(ids)} documents to vector database")
+            # Create all embeddings in one batched call
+            embeddings = _encode_texts(self.embedding_model, documents_text)
+            
+            # Upsert into ChromaDB in bounded slices; its validator only accepts
+            # nested lists of Python floats, so each slice is converted out of
+            # numpy just before it is written
+            for s in range(0, len(ids), UPSERT_BATCH_SIZE):
+                e = s + UPSERT_BATCH_SIZE
+                self.collection.upsert(
+                    ids=ids[s:e],
+                    embeddings=embeddings[s:e].tolist(),
+                    documents=documents_text[s:e],
+                    metadatas=metadatas[s:e]
+                )
+            if self._use_memory_index:
+                self._mirror(ids, embeddings)
+            
+            logger.info(f"Added {len(ids)} documents to vector database"
+                        f" ({len(existing)} already present)")
             return True
             
         except Exception as e:
             logger.error(f"Error adding documents to vector database: {str(e)}")
             return False
     
-    def search(self, query: str, n_results: int = 5, filter_metadata: Optional[Dict] = None) -> List[Dict[str, Any]]:
+    def search(self, query: str, n_results: int = 5, filter_metadata: Optional[Dict] = None,
+               include: Tuple[str, ...] = DEFAULT_SEARCH_FIELDS) -> List[Dict[str, Any]]:
         """
         Search for relevant documents using semantic similarity.
         
@@ -125,42 +399,106 @@ class VectorDatabase:
             query: Search query
             n_results: Number of results to return
             filter_metadata: Optional metadata filters
+            include: Chroma fields to fetch; e.g. ('distances',) returns only
+                IDs and scores, skipping the document text and metadata
             
         Returns:
             List of relevant document chunks with scores
         """
         try:
-            if not query:
-                return []
+            formatted_results = list(self.isearch(query, n_results, filter_metadata, include))
+            if query:
+                logger.info(f"Found {len(formatted_results)} relevant documents for query: {query[:50]}...")
+            return formatted_results
             
-            # Create query embedding
-            query_embedding = self.embedding_model.encode(query).tolist()
+        except Exception as e:
+            logger.error(f"Error searching vector database: {str(e)}")
+            return []
+    
+    def isearch(self, query: str, n_results: int = 5, filter_metadata: Optional[Dict] = None,
+                include: Tuple[str, ...] = DEFAULT_SEARCH_FIELDS) -> Iterator[Dict[str, Any]]:
+        """
+        Search for relevant documents, yielding results best first as they are formatted.
+        
+        Unlike ``search``, errors propagate to the caller, and a caller that
+        stops early never formats the remaining results.
+        
+        Args:
+            query: Search query
+            n_results: Number of results to return
+            filter_metadata: Optional metadata filters
+            include: Chroma fields to fetch, any of 'documents', 'metadatas'
+                and 'distances'
             
-            # Search in ChromaDB
+        Yields:
+            Result dicts with the chunk 'id' plus 'content', 'metadata' and
+            'score'/'distance' for the included fields
+        """
+        if not query:
+            return
+        
+        # Create query embedding (repeat queries are served from the cache)
+        query_embedding = _embed_query_cached(settings.embedding_model, query)
+        
+        if self._memory_index is not None and filter_metadata is None:
+            # Nearest neighbours from the local mirror; Chroma only serves the payloads
+            results = self._memory_query(query_embedding, n_results, include)
+        else:
             results = self.collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=[query_embedding.tolist()],
                 n_results=n_results,
                 where=filter_metadata,
-                include=['documents', 'metadatas', 'distances']
+                include=list(include)
             )
+        
+        # Format results
+        include_documents = 'documents' in include
+        include_metadatas = 'metadatas' in include
+        include_distances = 'distances' in include
+        for i, doc_id in enumerate(results['ids'][0]):
+            result = {'id': doc_id}
+            if include_documents:
+                result['content'] = results['documents'][0][i]
+            if include_metadatas:
+                result['metadata'] = results['metadatas'][0][i]
+            if include_distances:
+                distance = results['distances'][0][i]
+                result['score'] = 1 - distance  # Convert distance to similarity score
+                result['distance'] = distance
+            yield result
+    
+    def _memory_query(self, query_embedding: np.ndarray, n_results: int,
+                      include: Tuple[str, ...]) -> Dict[str, Any]:
+        """
+        Search the in-memory index and fetch the requested fields from Chroma by ID.
+        
+        Args:
+            query_embedding: Query vector
+            n_results: Number of results to return
+            include: Chroma fields to return
             
-            # Format results
-            formatted_results = []
-            for i in range(len(results['documents'][0])):
-                result = {
-                    'content': results['documents'][0][i],
-                    'metadata': results['metadatas'][0][i],
-                    'score': 1 - results['distances'][0][i],  # Convert distance to similarity score
-                    'distance': results['distances'][0][i]
-                }
-                formatted_results.append(result)
-            
-            logger.info(f"Found {len(formatted_results)} relevant documents for query: {query[:50]}...")
-            return formatted_results
-            
-        except Exception as e:
-            logger.error(f"Error searching vector database: {str(e)}")
-            return []
+        Returns:
+            Results in the layout of a single-query ``collection.query`` call
+        """
+        ids, distances = self._memory_index.query(query_embedding, n_results)
+        results = {'ids': [ids], 'distances': [distances]}
+        
+        fields = [field for field in include if field != 'distances']
+        if ids and fields:
+            # get() returns rows in storage order, so map them back to rank order
+            fetched = self.collection.get(ids=ids, include=fields)
+            position = {doc_id: i for i, doc_id in enumerate(fetched['ids'])}
+            # Skip IDs deleted from Chroma by another client since the mirror was built
+            ranked = [(i, position[doc_id]) for i, doc_id in enumerate(ids) if doc_id in position]
+            results['ids'] = [[ids[i] for i, _ in ranked]]
+            results['distances'] = [[distances[i] for i, _ in ranked]]
+            for field in fields:
+                results[field] = [[fetched[field][p] for _, p in ranked]]
+        return results
+    
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed a single piece of text with the shared embedding model; the cached array is read-only."""
+        return _embed_query_cached(settings.embedding_model, text)
     
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector database collection."""
@@ -169,7 +507,8 @@ class VectorDatabase:
             return {
                 'total_documents': count,
                 'collection_name': self.collection.name,
-                'embedding_model': settings.embedding_model
+                'embedding_model': settings.embedding_model,
+                'query_cache': _embed_query_cached.cache_info()._asdict()
             }
         except Exception as e:
             logger.error(f"Error getting collection stats: {str(e)}")
@@ -179,6 +518,7 @@ class VectorDatabase:
         """Delete the entire collection (use with caution)."""
         try:
             self.client.delete_collection(name="documentation_chunks")
+            self._memory_index = None
             logger.info("Collection deleted successfully")
             return True
         except Exception as e:
@@ -188,7 +528,11 @@ class VectorDatabase:
     def reset_database(self) -> bool:
         """Reset the entire database (use with caution)."""
         try:
+            # Imported here so opening the database doesn't load the parsing stack
+            from .document_processor import clear_extraction_cache
+            
             self.client.reset()
+            clear_extraction_cache()
             self._initialize()
             logger.info("Database reset successfully")
             return True
@@ -221,21 +565,27 @@ class DocumentChunker:
         # Split content into chunks
         chunks = self._split_text(content)
         
+        # Fields shared by every chunk of the document, computed once
+        source = document.get('source', '')
+        status = document.get('status', '')
+        doc_type = self._determine_doc_type(source)
+        total_chunks = len(chunks)
+        base_metadata = dict(document.get('metadata', {}))
+        base_metadata['original_length'] = len(content)
+        
         # Create chunk documents
         chunk_documents = []
         for i, chunk in enumerate(chunks):
+            metadata = base_metadata.copy()
+            metadata['chunk_length'] = len(chunk)
             chunk_doc = {
                 'content': chunk,
-                'source': document.get('source', ''),
-                'status': document.get('status', ''),
+                'source': source,
+                'status': status,
                 'chunk_index': i,
-                'total_chunks': len(chunks),
-                'doc_type': self._determine_doc_type(document.get('source', '')),
-                'metadata': {
-                    **document.get('metadata', {}),
-                    'original_length': len(content),
-                    'chunk_length': len(chunk)
-                }
+                'total_chunks': total_chunks,
+                'doc_type': doc_type,
+                'metadata': metadata
             }
             chunk_documents.append(chunk_doc)
         
@@ -243,23 +593,29 @@ class DocumentChunker:
     
     def _split_text(self, text: str) -> List[str]:
         """Split text into chunks with overlap."""
-        if len(text) <= self.chunk_size:
+        text_length = len(text)
+        if text_length <= self.chunk_size:
             return [text]
         
+        # str.rfind scans each ~200 char window in C and stops at the first
+        # hit, which measured well ahead of pre-scanning the whole text for
+        # boundary offsets (regex, per-character or a bytes.translate
+        # sentinel pass) and bisecting into them
+        rfind = text.rfind
         chunks = []
         start = 0
         
-        while start < len(text):
+        while start < text_length:
             end = start + self.chunk_size
             
             # Try to break at sentence boundaries
-            if end < len(text):
+            if end < text_length:
                 # Look for sentence endings near the chunk boundary
-                search_start = max(start + self.chunk_size - 100, start)
-                search_end = min(end + 100, len(text))
+                search_start = max(end - 100, start)
+                search_end = min(end + 100, text_length)
                 
-                for punct in ['. ', '.\n', '!\n', '?\n']:
-                    last_punct = text.rfind(punct, search_start, search_end)
+                for punct in SENTENCE_ENDINGS:
+                    last_punct = rfind(punct, search_start, search_end)
                     if last_punct != -1:
                         end = last_punct + len(punct)
                         break
@@ -270,7 +626,7 @@ class DocumentChunker:
             
             # Move start position with overlap
             start = end - self.chunk_overlap
-            if start >= len(text):
+            if start >= text_length:
                 break
         
         return chunks
@@ -279,16 +635,16 @@ class DocumentChunker:
         """Determine document type from source."""
         source_lower = source.lower()
         
-        if any(ext in source_lower for ext in ['.md', '.markdown']):
-            return 'markdown'
-        elif any(ext in source_lower for ext in ['.html', '.htm']):
-            return 'html'
-        elif '.pdf' in source_lower:
-            return 'pdf'
-        elif any(ext in source_lower for ext in ['.json', '.yaml', '.yml']):
+        # A URL's query string and fragment are not part of its extension
+        path = source_lower.split('?', 1)[0].split('#', 1)[0]
+        doc_type = DOC_TYPES_BY_EXTENSION.get(os.path.splitext(path)[1])
+        
+        if doc_type == 'config':
             if 'openapi' in source_lower or 'swagger' in source_lower:
                 return 'api_spec'
             return 'config'
+        elif doc_type is not None:
+            return doc_type
         elif source_lower.startswith('http'):
             return 'web'
         else:
@@ -0,0 +1,117 @@
+"""
+Tests for document extraction and directory ingest.
+"""
+
+import asyncio
+
+import pytest
+
+from src.document_processor import DocumentProcessor, ingest_paths
+
+SPHINX_PAGE = """<html>
+<head>
+<style>.sig { font-weight: bold; }</style>
+<script>window.analytics = true;</script>
+</head>
+<body>
+<dl class="py function">
+<dt class="sig">create_user(email, password)</dt>
+<dd><p>Creates a user.</p></dd>
+</dl>
+<div>Rate limits apply to every endpoint: 100 requests per minute per API key,
+after which the server answers with HTTP 429 until the window resets.</div>
+<pre><code>client.create_user("a@example.com", "secret")</code></pre>
+</body>
+</html>"""
+
+
+def test_html_keeps_definition_terms():
+    page = """<dl>
+<dt>delete_user(user_id)</dt>
+<dd>Deletes a user and revokes their API keys.</dd>
+</dl>"""
+    text = DocumentProcessor()._process_html_content(page)
+
+    assert "delete_user(user_id)" in text
+    assert "Deletes a user and revokes their API keys." in text
+
+
+def test_html_falls_back_to_full_page_for_div_text():
+    text = DocumentProcessor()._process_html_content(SPHINX_PAGE)
+
+    assert "create_user(email, password)" in text
+    assert "Creates a user." in text
+    assert "Rate limits apply to every endpoint" in text
+    assert 'client.create_user("a@example.com", "secret")' in text
+    assert "window.analytics" not in text
+    assert "font-weight" not in text
+
+
+def test_iter_supported_files_follows_file_symlinks_only(tmp_path):
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "shared.md").write_text("# Shared")
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "guide.md").write_text("# Guide")
+    (docs / "shared.md").symlink_to(outside / "shared.md")
+    # A directory link back to the root would loop forever if followed
+    (docs / "loop").symlink_to(tmp_path, target_is_directory=True)
+
+    found = sorted(DocumentProcessor().iter_supported_files(str(docs)))
+
+    assert found == [str(docs / "guide.md"), str(docs / "shared.md")]
+
+
+def _pipeline_tasks():
+    """Tasks started by ingest_paths that are still alive."""
+    return [task for task in asyncio.all_tasks()
+            if task.get_coro().__qualname__.startswith("ingest_paths.")]
+
+
+def test_ingest_paths_raises_worker_error_and_cancels_the_rest():
+    started = []
+
+    async def ingest(path):
+        started.append(path)
+        if path == "bad.md":
+            raise RuntimeError("worker died")
+        # Other consumers are still busy when the failure is reported
+        await asyncio.sleep(10)
+        return [path]
+
+    async def run():
+        # More paths than the queue holds, so the walk is blocked on a full queue
+        paths = iter(["bad.md"] + [f"doc{i}.md" for i in range(50)])
+        with pytest.raises(RuntimeError, match="worker died"):
+            async for _ in ingest_paths(paths, ingest, workers=2):
+                pass
+        assert not _pipeline_tasks()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert "bad.md" in started
+
+
+def test_ingest_paths_early_close_cancels_tasks():
+    async def ingest(path):
+        return [path]
+
+    async def run():
+        results = ingest_paths(iter([f"doc{i}.md" for i in range(50)]), ingest, workers=2)
+        assert await results.__anext__()
+        await results.aclose()
+        assert not _pipeline_tasks()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+
+def test_ingest_paths_yields_every_result():
+    async def ingest(path):
+        return [path]
+
+    async def run():
+        paths = [f"doc{i}.md" for i in range(20)]
+        results = [chunks async for chunks in ingest_paths(iter(paths), ingest, workers=3)]
+        return sorted(chunk for chunks in results for chunk in chunks)
+
+    assert asyncio.run(run()) == sorted(f"doc{i}.md" for i in range(20))